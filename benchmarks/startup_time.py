@@ -0,0 +1,131 @@
+"""
+Cold-start benchmark for the CLI.
+
+Imports each module in a fresh interpreter with ``python -X importtime`` and
+reports the wall time (median of several runs) and the slowest imports, so
+import-time regressions show up before they reach the job runner, which
+starts a new process for every task.
+
+Usage:
+    python benchmarks/startup_time.py
+    python benchmarks/startup_time.py --module flow.agents --runs 10 --top 20
+    python benchmarks/startup_time.py --json output/startup_time.json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ["main", "flow.agents"]
+
+# "import time:      1234 |       5678 |   package.module"
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """
+    Parse ``-X importtime`` output.
+
+    Returns:
+        List[Dict]: One entry per imported module with its self and
+        cumulative time in milliseconds and its nesting depth
+    """
+    entries = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            entries.append({
+                "module": match.group(4),
+                "self_ms": int(match.group(1)) / 1000,
+                "cumulative_ms": int(match.group(2)) / 1000,
+                "depth": (len(match.group(3)) - 1) // 2,
+            })
+    return entries
+
+
+def measure(module: str, runs: int = 5) -> Dict:
+    """
+    Import ``module`` in ``runs`` fresh interpreters.
+
+    Args:
+        module (str): Module to import, e.g. "main"
+        runs (int): Number of interpreters to start
+
+    Returns:
+        Dict: Wall times in milliseconds, their median, and the parsed
+        import times of the last run
+    """
+    wall_ms = []
+    entries = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=REPO_ROOT, capture_output=True, text=True,
+        )
+        wall_ms.append((time.perf_counter() - started) * 1000)
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "unknown error"
+            return {"module": module, "error": error}
+        entries = parse_importtime(completed.stderr)
+    return {
+        "module": module,
+        "runs": runs,
+        "wall_ms": [round(ms, 1) for ms in wall_ms],
+        "median_wall_ms": round(statistics.median(wall_ms), 1),
+        "import_ms": round(sum(entry["self_ms"] for entry in entries), 1),
+        "modules_imported": len(entries),
+        "imports": entries,
+    }
+
+
+def print_report(result: Dict, top: int = 15):
+    """Print the timings of one module and its slowest top-level imports."""
+    if "error" in result:
+        print(f"❌ {result['module']}: import failed ({result['error']})")
+        return
+    print(f"\n⏱️ import {result['module']}: median {result['median_wall_ms']:.1f} ms wall over {result['runs']} runs "
+          f"({result['import_ms']:.1f} ms in {result['modules_imported']} imports)")
+    slowest = sorted(result["imports"], key=lambda entry: entry["cumulative_ms"], reverse=True)
+    print(f"   {'cumulative':>10}  {'self':>8}  module")
+    for entry in slowest[:top]:
+        print(f"   {entry['cumulative_ms']:>8.1f}ms  {entry['self_ms']:>6.1f}ms  {'  ' * entry['depth']}{entry['module']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the cold-start import time of the CLI.")
+    parser.add_argument("--module", action="append", dest="modules",
+                        help=f"Module to import; repeat for several (default: {', '.join(DEFAULT_MODULES)})")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module (default: 5)")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list per module (default: 15)")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = [measure(module, max(1, args.runs)) for module in args.modules or DEFAULT_MODULES]
+    for result in results:
+        print_report(result, args.top)
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "measured_at": datetime.now().isoformat(),
+                "python": sys.version.split()[0],
+                "results": results,
+            }, f, indent=2)
+        print(f"\n📄 Results written to {args.json}")
+
+    if any("error" in result for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
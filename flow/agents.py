@@ -8,15 +8,25 @@ from datetime import datetime
 from colorama import init
 
 # Import all agents from the agents package
-from openai_agents.researcher import Researcher
+from openai_agents.researcher import RESEARCH_SEARCH_TOKEN_BUDGET, Researcher
 from openai_agents.keyword_researcher import KeywordResearcher
 from openai_agents.blog_trend_researcher import BlogTrendResearcher
-from openai_agents.outline_creator import OutlineCreator
-from openai_agents.writer import Writer
+from openai_agents.outline_creator import OUTLINE_PROMPT_TOKEN_BUDGET, OutlineCreator
+from openai_agents.writer import WRITER_PROMPT_TOKEN_BUDGET, WRITER_SECTION_PROMPT_TOKEN_BUDGET, Writer
 from openai_agents.seo_checker import SEOChecker
 from openai_agents.proofreader import Proofreader
+from openai_agents.word_count_editor import WORD_COUNT_TOLERANCE, WordCountEditor
+from openai_agents.schemas import BlogOutline, TrendReport
+from openai_agents.base import response_cache_enabled, run_sync
+from openai_agents.usage import TokenBudgetExceeded, UsageLedger, get_current_ledger, track_usage, usage_stage
 import random
 
+from flow.checkpoint import CheckpointStore, StageOutputError, check_stage_output
+from flow.scheduler import Stage, run_stages
+from flow.streaming import stream_to_file
+from tools.seo_analyzer import SEOAnalyzer
+from tools.tracing import get_current_span, span, start_trace
+
 
 def safe_json_loads_with_fix(json_str: str) -> list:
     """Safely parse JSON string and return list."""
@@ -34,14 +44,88 @@ def safe_json_loads_with_fix(json_str: str) -> list:
         return []
 
 
-def orchestrate_blog_creation(config: Dict[str, Any]) -> Dict[str, Any]:
+def _parse_trends(trends: Any) -> tuple[str, str]:
+    """Extract the trend summary and a randomly chosen generated title."""
+    if isinstance(trends, TrendReport):
+        trend_summary, titles = trends.summary, trends.blog_titles
+    elif isinstance(trends, dict):
+        trend_summary, titles = trends.get("summary", str(trends)), trends.get("blog_titles", [])
+    else:
+        trend_summary, titles = str(trends), []
+    generated_title = random.choice(titles) if titles else ""
+    return trend_summary, generated_title
+
+
+def _prepare_outline(outline_result: Any, faq: bool, has_product: bool) -> str:
+    """
+    Serialize the outline, dropping FAQ/product entries that were not requested.
+
+    Raises:
+        StageOutputError: The outline agent returned an error string, or no
+            outline entries could be parsed from its output
+    """
+    if isinstance(outline_result, BlogOutline):
+        outline_data = outline_result.to_outline_list(include_faq=faq, include_product=has_product)
+    else:
+        # Legacy free-text outlines; error strings fail the stage instead of parsing to []
+        check_stage_output("outline", outline_result)
+        outline_data = safe_json_loads_with_fix(str(outline_result))
+        if not isinstance(outline_data, list):
+            outline_data = []
+
+        if not faq:
+            outline_data = [item for item in outline_data if not (isinstance(item, dict) and "faq" in item)]
+
+        if not has_product:
+            outline_data = [item for item in outline_data if not (isinstance(item, dict) and "product_title" in item)]
+
+    if not outline_data:
+        raise StageOutputError(f"Stage 'outline' failed: no outline entries in {str(outline_result)[:200]!r}")
+
+    outline = json.dumps(outline_data, ensure_ascii=False)
+    print(f"Outline created: {outline}")
+    return outline
+
+
+def build_blog_stages(config: Dict[str, Any], time_to_first_token: Dict[str, float] | None = None,
+                      checkpoint: CheckpointStore | None = None) -> list[Stage]:
+    """
+    Define the blog creation workflow as a dependency graph.
+
+    Research runs alongside the keyword chain. The draft is checked by the
+    local SEO analyzer and its issues go into the proofreading prompt; the
+    LLM SEO review only runs with ``config["llm_seo"]`` set, alongside
+    proofreading. Unless ``config["fit_word_count"]`` is false, the sections
+    of the proofread blog that miss their word budget are then expanded or
+    trimmed.
+
+    With ``config["stream"]`` set, the Writer and Proofreader stream their
+    output into ``<blog>.draft.md`` and the final blog file as it is
+    generated, recording each stage's time to first token in
+    ``time_to_first_token``.
+
+    With ``config["writer_mode"]`` set to ``"sections"``, the draft is
+    written one outline section per concurrent call and stitched in order.
+    With ``config["proofreader_mode"]`` set to ``"chunked"``, the draft is
+    proofread one H2 section per concurrent call, followed by a short pass
+    over the joins.
+
+    With a ``checkpoint`` store, each stage's output is saved as it
+    completes and stages already saved there are reloaded instead of run.
+    """
     # Initialize all specialized agents
-    researcher = Researcher()
+    prompt_token_budgets = config.get("prompt_token_budgets", {})
+    researcher = Researcher(prompt_token_budgets.get("research_search", RESEARCH_SEARCH_TOKEN_BUDGET))
     keyworder = KeywordResearcher()
     trender = BlogTrendResearcher()
-    outliner = OutlineCreator()
-    writer = Writer()
+    outliner = OutlineCreator(prompt_token_budgets.get("outline", OUTLINE_PROMPT_TOKEN_BUDGET))
+    writer = Writer(
+        prompt_token_budgets.get("draft", WRITER_PROMPT_TOKEN_BUDGET),
+        prompt_token_budgets.get("draft_section", WRITER_SECTION_PROMPT_TOKEN_BUDGET),
+    )
     seo = SEOChecker()
+    seo_analyzer = SEOAnalyzer(config.get("language", "English"))
+    length_editor = WordCountEditor(config.get("word_count_tolerance", WORD_COUNT_TOLERANCE))
     proofreader = Proofreader()
 
     # Extract values from config
@@ -56,93 +140,269 @@ def orchestrate_blog_creation(config: Dict[str, Any]) -> Dict[str, Any]:
     include_keywords = config.get("include_keywords", "")
     avoid_keywords = config.get("avoid_keywords", "")
     intent = config.get("intent", "inform")
-    title = config.get("title", "")
     url = config.get("url", "")
     faq = config.get("faq", False)
     has_product = config.get("has_product", False)
-    product_name = config.get("product_name", "")
-    product_url = config.get("product_url", "")
-    product_image_url = config.get("product_image_url", "")
-    product_description_text = config.get("product_description_text", "")
-    product_price_min = config.get("product_price_min", "")
-    product_price_max = config.get("product_price_max", "")
-    product_currency = config.get("product_currency", "")
-
-    # Execute the sequential workflow with each specialized agent
-    print(f"Researching topic")
-    research = researcher.run(topic, keywords)
-    seed_keywords = keyworder.generate_seed_keywords(topic, tone, language,keywords)
-    keywords_result = keyworder.run(topic, seed_keywords, tone, language,)
-    
-    trends = trender.run(topic, keywords_result, current_year, language)
-    trend_summary = ""
-    trending_titles = []
-    
-    # if isinstance(trends, str):
-    #     try:
-    #         trends_data = json.loads(trends)
-    #         trend_summary = trends_data.get("summary", "")
-    #         trending_titles = trends_data.get("blog_titles", [])
-    #     except json.JSONDecodeError as e:
-    #         print(f"JSON parsing error: {e}")
-    #         trend_summary = trends  
-    # else:
-    trend_summary = trends.get("summary", str(trends)) if isinstance(trends, dict) else str(trends)
-    generated_title = trends.get("blog_titles", []) if isinstance(trends, dict) else []
-    if generated_title:
-        generated_title = random.choice(generated_title)
-    else:
-        generated_title = ""
+    # Product fields only reach the outline prompt when a product is promoted
+    product = {
+        key: config.get(key, "")
+        for key in ("product_name", "product_url", "product_image_url", "product_description_text",
+                    "product_price_min", "product_price_max", "product_currency")
+    } if has_product else {}
+    # None keeps the OPENAI_RESPONSE_CACHE default; bypassed stages always call the API
+    llm_cache = config.get("llm_cache")
+    llm_cache_bypass = set(config.get("llm_cache_bypass", []))
+    stream = config.get("stream", False)
+    writer_mode = config.get("writer_mode", "single")
+    proofreader_mode = config.get("proofreader_mode", "single")
+    llm_seo = config.get("llm_seo", False)
+    fit_word_count = config.get("fit_word_count", True)
+    stall_timeout = config.get("stream_stall_timeout", 120)
+    output_path = blog_output_path(topic, config.get("output_suffix", ""))
+    if time_to_first_token is None:
+        time_to_first_token = {}
 
+    def stage(name, func, deps=None, degrade=None, uses_tokens=True) -> Stage:
+        """
+        Wrap a stage in a trace span, label its token usage, make its agent
+        calls honour the per-stage response cache setting and enforce the
+        token budget. ``degrade`` produces the stage's result without any
+        agent calls once the budget is used up; stages without it abort.
+        Stages that make no agent calls pass ``uses_tokens=False``.
+        Agent error strings fail the stage instead of being passed on, and
+        only real output is checkpointed.
+        """
+        use_cache = False if name in llm_cache_bypass else llm_cache
 
-    outline_result = outliner.run(
-        keywords=keywords_result,
-        topic=topic,
-        research_summary=research,
-        trend_summary=trend_summary
-    )
-    try:
-        outline_data = safe_json_loads_with_fix(outline_result)
-        
-        if not faq:
-            outline_data = [item for item in outline_data if "faq" not in item]
+        async def run(inputs):
+            with span(name, kind="stage") as stage_span, usage_stage(name), response_cache_enabled(use_cache):
+                stage_span.record_input("\n".join(str(value) for value in inputs.values()))
+                if checkpoint is not None:
+                    found, saved = checkpoint.load(name)
+                    if found:
+                        print(f"♻️ Loaded stage from checkpoint: {name}")
+                        stage_span.set(checkpoint="loaded")
+                        return saved
+                ledger = get_current_ledger()
 
-        if not has_product:
-            outline_data = [item for item in outline_data if "product_title" not in item]
+                def degraded():
+                    print(f"⚠️ Token budget exhausted, degrading stage: {name}")
+                    result = degrade(inputs)
+                    ledger.mark_degraded(name)
+                    stage_span.set(degraded=True)
+                    stage_span.record_output(str(result))
+                    return result
 
-        outline = json.dumps(outline_data)
-    except Exception as e:
-        print(f"Error processing outline data: {e}")
-        outline = outline_result  
-    
-    print(f"Outline created: {outline}")
-     
-    draft = writer.run(
-        outline=outline, 
-        research=research, 
-        keywords=keywords_result, 
-        trend_summary=trend_summary,
-        tone=tone, 
-        language=language, 
-        word_count=word_count,
-        blog_length=blog_length, 
-        include_keywords=include_keywords, 
-        avoid_keywords=avoid_keywords,
-        intent=intent, 
-        title=topic, 
-        generated_title=generated_title
+                if uses_tokens and ledger is not None and not ledger.check(name, can_degrade=degrade is not None):
+                    return degraded()
+                try:
+                    result = await func(inputs)
+                except TokenBudgetExceeded:
+                    # Too little budget left for one of the stage's calls
+                    if degrade is None or ledger is None or ledger.policy == "abort":
+                        raise
+                    return degraded()
+                check_stage_output(name, result)
+                if checkpoint is not None:
+                    checkpoint.save(name, result)
+                stage_span.record_output(str(result))
+                if name in time_to_first_token:
+                    stage_span.set(time_to_first_token_ms=round(time_to_first_token[name] * 1000, 1))
+                return result
+        return Stage(name, run, deps)
+
+    async def research(inputs):
+        print(f"Researching topic")
+        return await researcher.run_async(topic, keywords)
+
+    async def seed_keywords(inputs):
+        return await keyworder.generate_seed_keywords_async(topic, tone, language, keywords)
+
+    async def keywords_result(inputs):
+        return await keyworder.run_async(topic, inputs["seed_keywords"], tone, language)
+
+    async def trends(inputs):
+        trends = await trender.run_async(topic, inputs["keywords_result"], current_year, language)
+        return _parse_trends(trends)
+
+    async def outline(inputs):
+        trend_summary, _ = inputs["trends"]
+        outline_result = await outliner.run_async(
+            keywords=inputs["keywords_result"],
+            topic=topic,
+            research_summary=inputs["research"],
+            trend_summary=trend_summary,
+            audience=audience,
+            language=language,
+            **product
+        )
+        return _prepare_outline(outline_result, faq, has_product)
+
+    async def draft(inputs):
+        trend_summary, generated_title = inputs["trends"]
+        writer_args = dict(
+            outline=inputs["outline"],
+            research=inputs["research"],
+            keywords=inputs["keywords_result"],
+            trend_summary=trend_summary,
+            tone=tone,
+            language=language,
+            word_count=word_count,
+            blog_length=blog_length,
+            include_keywords=include_keywords,
+            avoid_keywords=avoid_keywords,
+            intent=intent,
+            title=topic,
+            generated_title=generated_title
+        )
+        if writer_mode == "sections":
+            if not stream:
+                return await writer.write_sections_async(**writer_args)
+            chunks = writer.stream_sections_async(**writer_args, stall_timeout=stall_timeout)
+        elif not stream:
+            return await writer.run_async(**writer_args)
+        else:
+            chunks = writer.stream_async(**writer_args, stall_timeout=stall_timeout)
+        draft_path = output_path[:-len(".md")] + ".draft.md"
+        text, time_to_first_token["draft"] = await stream_to_file(chunks, draft_path, "draft")
+        return text
+
+    async def seo_result(inputs):
+        report = seo_analyzer.analyze(inputs["draft"], inputs["keywords_result"], word_count)
+        print(f"🔎 SEO analysis: {len(report['issues'])} issues, "
+              f"keyword coverage {report['keyword_coverage']} ({report['elapsed_ms']} ms)")
+        return report
+
+    async def word_count_fit(inputs):
+        return await length_editor.run_async(
+            inputs["final_blog"], word_count, config.get("word_count_rounds", 1)
+        )
+
+    async def seo_review(inputs):
+        # Best effort: nothing downstream uses the review, so its failure must not fail the blog
+        try:
+            review = await seo.run_async(inputs["draft"], inputs["keywords_result"])
+            check_stage_output("seo_review", review)
+            return review
+        except Exception as e:
+            print(f"⚠️ SEO review failed, skipping it: {e}")
+            current = get_current_span()
+            if current is not None:
+                current.mark_error(f"{type(e).__name__}: {e}")
+            return ""
+
+    async def final_blog(inputs):
+        seo_issues = SEOAnalyzer.format_issues(inputs["seo_result"])
+        if proofreader_mode == "chunked":
+            if not stream:
+                return await proofreader.run_chunked_async(inputs["draft"], word_count, audience, url, seo_issues)
+            chunks = proofreader.stream_chunked_async(inputs["draft"], word_count, audience, url, seo_issues)
+        elif not stream:
+            return await proofreader.run_async(inputs["draft"], word_count, audience, url, seo_issues)
+        else:
+            chunks = proofreader.stream_async(inputs["draft"], word_count, audience, url, seo_issues, stall_timeout=stall_timeout)
+        text, time_to_first_token["final_blog"] = await stream_to_file(chunks, output_path, "final_blog")
+        return text
+
+    stages = [
+        stage("research", research),
+        stage("seed_keywords", seed_keywords),
+        stage("keywords_result", keywords_result, deps=["seed_keywords"]),
+        stage("trends", trends, deps=["keywords_result"], degrade=lambda inputs: ("", "")),
+        stage("outline", outline, deps=["keywords_result", "research", "trends"]),
+        stage("draft", draft, deps=["outline", "research", "keywords_result", "trends"]),
+        stage("seo_result", seo_result, deps=["draft", "keywords_result"], uses_tokens=False),
+        stage("final_blog", final_blog, deps=["draft", "seo_result"], degrade=lambda inputs: inputs["draft"]),
+    ]
+    if fit_word_count:
+        stages.append(stage(
+            "word_count_fit", word_count_fit, deps=["final_blog"], degrade=lambda inputs: inputs["final_blog"]
+        ))
+    if llm_seo:
+        stages.append(stage("seo_review", seo_review, deps=["draft", "keywords_result"], degrade=lambda inputs: ""))
+    return stages
+
+
+def blog_output_path(topic: str, suffix: str = "") -> str:
+    """
+    Return the markdown file the final blog for ``topic`` is written to.
+    ``suffix`` (e.g. a batch item index) tells apart runs with the same topic.
+    """
+    safe_topic = topic.replace(' ', '_').replace('/', '_').replace('\\', '_')
+    if suffix:
+        safe_topic += "_" + str(suffix).replace('/', '_').replace('\\', '_')
+    return f"output/blog_{safe_topic}.md"
+
+
+async def orchestrate_blog_creation_async(config: Dict[str, Any] | None = None,
+                                          run_id: str | None = None) -> Dict[str, Any]:
+    """
+    Run the blog workflow, executing independent stages concurrently.
+
+    Every completed stage is checkpointed under the run ID (unless
+    ``config["checkpoint"]`` is false). Passing the ``run_id`` of an earlier
+    run resumes it with its saved config: finished stages are reloaded and
+    the workflow continues from the first missing one.
+    """
+    if config is None and not run_id:
+        raise ValueError("config or run_id is required")
+
+    checkpoint = None
+    if run_id:
+        checkpoint = CheckpointStore(run_id)
+        if not checkpoint.exists():
+            raise FileNotFoundError(f"No checkpoints found for run '{run_id}' in {checkpoint.directory}")
+        config = checkpoint.load_config()
+        print(f"♻️ Resuming run {run_id}; completed stages: {', '.join(checkpoint.completed()) or 'none'}")
+    elif config.get("checkpoint", True):
+        checkpoint = CheckpointStore()
+        checkpoint.save_config(config)
+        print(f"🧾 Run ID: {checkpoint.run_id} (resume with --resume {checkpoint.run_id})")
+
+    time_to_first_token: Dict[str, float] = {}
+    ledger = UsageLedger(
+        budget=config.get("token_budget"),
+        policy=config.get("token_budget_policy", "degrade"),
     )
+    filename = blog_output_path(config.get("topic", ""), config.get("output_suffix", ""))
+    trace_file = filename[:-len(".md")] + ".trace.json"
+
+    # Every stage and external call records a span; the trace is written
+    # next to the blog even when a stage fails
+    with start_trace("blog_creation", topic=config.get("topic", "")) as trace, track_usage(ledger):
+        try:
+            results = await run_stages(build_blog_stages(config, time_to_first_token, checkpoint))
+        finally:
+            trace.duration = trace.elapsed()
+            trace.attributes["token_usage"] = ledger.to_dict()["total"]
+            trace.write(trace_file)
+    final_blog = results.get("word_count_fit", results["final_blog"])
+    usage = ledger.to_dict()
+    print(f"🔢 Tokens used: {usage['total']['total_tokens']} "
+          f"(input {usage['total']['input_tokens']}, cached {usage['total']['cached_input_tokens']}, "
+          f"output {usage['total']['output_tokens']})")
+
+    resumed_final = checkpoint is not None and "final_blog" in checkpoint.loaded
+    if (not config.get("stream", False) or "final_blog" in usage["degraded_stages"]
+            or resumed_final or final_blog != results["final_blog"]):
+        # Streamed runs have already written the file as it was generated,
+        # unless it was reloaded or the word count correction changed it
+        os.makedirs("output", exist_ok=True)
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(final_blog)
 
-    
-    seo_result = seo.run(draft, keywords_result)
-    final_blog = proofreader.run(draft, word_count, audience, url)
-    
-    os.makedirs("output", exist_ok=True)
-    filename = f"output/blog_{topic.replace(' ', '_').replace('/', '_').replace('\\', '_')}.md"
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(final_blog)
-    
     return {
         "final_blog": final_blog,
-
+        "output_file": filename,
+        "run_id": checkpoint.run_id if checkpoint is not None else None,
+        "seo_report": results["seo_result"],
+        "seo_review": results.get("seo_review"),
+        "time_to_first_token": time_to_first_token,
+        "trace_file": trace_file,
+        "usage": usage,
     }
+
+
+def orchestrate_blog_creation(config: Dict[str, Any] | None = None, run_id: str | None = None) -> Dict[str, Any]:
+    """Synchronous entry point for :func:`orchestrate_blog_creation_async`."""
+    return run_sync(orchestrate_blog_creation_async(config, run_id))
@@ -0,0 +1,194 @@
+"""
+Batch mode: generate many blogs from a JSONL or CSV file of blog configs
+in a single process, with a bounded number of blogs in flight at once.
+"""
+
+import asyncio
+import csv
+import json
+import math
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from flow.agents import orchestrate_blog_creation_async
+from openai_agents.base import run_sync
+
+# Config fields that arrive as strings from CSV files
+INT_FIELDS = {"word_count", "token_budget", "word_count_rounds"}
+FLOAT_FIELDS = {"stream_stall_timeout", "word_count_tolerance"}
+BOOL_FIELDS = {"faq", "has_product", "llm_cache", "stream", "llm_seo", "fit_word_count", "checkpoint"}
+# Comma-separated in CSV cells
+LIST_FIELDS = {"llm_cache_bypass"}
+
+
+def _coerce_config(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Drop empty CSV cells and convert known fields to their expected types.
+    Raises ValueError naming the field when a value cannot be converted.
+    """
+    config = {}
+    for key, value in raw.items():
+        if key is None or value is None or value == "":
+            continue
+        key = key.strip()
+        if isinstance(value, str):
+            value = value.strip()
+            try:
+                if key in INT_FIELDS:
+                    value = int(value)
+                elif key in FLOAT_FIELDS:
+                    value = float(value)
+            except ValueError:
+                raise ValueError(f"invalid value for '{key}': {value!r}") from None
+            if key in BOOL_FIELDS:
+                value = value.lower() in ("1", "true", "yes", "y")
+            elif key in LIST_FIELDS:
+                value = [item.strip() for item in value.split(",") if item.strip()]
+        config[key] = value
+    return config
+
+
+def load_blog_configs(path: str, defaults: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Load blog configs from a JSONL (one JSON object per line) or CSV file.
+
+    Args:
+        path (str): Path to a .jsonl/.json or .csv file
+        defaults (Dict): Values used for any field an item does not set
+
+    Returns:
+        List[Dict]: One merged config per blog
+
+    Raises:
+        ValueError: For an invalid line or value, prefixed with ``path:line``
+    """
+    items = []
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                try:
+                    items.append(_coerce_config(row))
+                except ValueError as e:
+                    raise ValueError(f"{path}:{reader.line_num}: {e}") from e
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}:{line_no}: invalid JSON: {e}") from e
+                if not isinstance(item, dict):
+                    raise ValueError(f"{path}:{line_no}: expected a JSON object")
+                try:
+                    items.append(_coerce_config(item))
+                except ValueError as e:
+                    raise ValueError(f"{path}:{line_no}: {e}") from e
+
+    return [{**(defaults or {}), **item} for item in items]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize_batch(records: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    """Build throughput and latency statistics for a finished batch."""
+    succeeded = [r for r in records if r["status"] == "success"]
+    latencies = [r["elapsed_seconds"] for r in succeeded]
+    return {
+        "total": len(records),
+        "succeeded": len(succeeded),
+        "failed": len(records) - len(succeeded),
+        "wall_seconds": round(wall_seconds, 2),
+        "blogs_per_hour": round(len(succeeded) / (wall_seconds / 3600), 2) if wall_seconds > 0 else 0.0,
+        "p50_latency_seconds": round(percentile(latencies, 50), 2),
+        "p95_latency_seconds": round(percentile(latencies, 95), 2),
+    }
+
+
+async def run_batch_async(configs: List[Dict[str, Any]], concurrency: int = 3,
+                          results_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run every config through the blog workflow with bounded concurrency.
+
+    Args:
+        configs (List[Dict]): Blog configs, e.g. from :func:`load_blog_configs`
+        concurrency (int): Maximum number of blogs generated at the same time
+        results_path (str): JSONL file that receives one record per blog as it
+            finishes (default: output/batch_results_<timestamp>.jsonl)
+
+    Returns:
+        Dict: ``records`` (per-item results in input order), ``summary`` and
+        ``results_path``
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    if not results_path:
+        results_path = f"output/batch_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+    os.makedirs(os.path.dirname(results_path) or ".", exist_ok=True)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    write_lock = asyncio.Lock()
+
+    async def run_item(index: int, config: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            topic = config.get("topic", "")
+            print(f"▶️ [{index}] Starting blog: {topic or '(no topic)'}")
+            # Items may share a topic; the index keeps their output and trace files apart
+            config = {**config, "output_suffix": config.get("output_suffix") or str(index)}
+            start = time.perf_counter()
+            record: Dict[str, Any] = {"index": index, "topic": topic}
+            try:
+                result = await orchestrate_blog_creation_async(config)
+                record.update(
+                    status="success",
+                    output_file=result.get("output_file"),
+                    run_id=result.get("run_id"),
+                    total_tokens=result.get("usage", {}).get("total", {}).get("total_tokens"),
+                )
+                print(f"✅ [{index}] Finished blog: {topic or '(no topic)'}")
+            except Exception as e:
+                record.update(status="failed", error=f"{type(e).__name__}: {e}")
+                print(f"❌ [{index}] Blog failed: {topic or '(no topic)'}: {e}")
+            record["elapsed_seconds"] = round(time.perf_counter() - start, 2)
+
+        async with write_lock:
+            with open(results_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return record
+
+    start = time.perf_counter()
+    records = await asyncio.gather(*(run_item(i, config) for i, config in enumerate(configs)))
+    summary = summarize_batch(list(records), time.perf_counter() - start)
+
+    return {"records": list(records), "summary": summary, "results_path": results_path}
+
+
+def run_batch(configs: List[Dict[str, Any]], concurrency: int = 3,
+              results_path: Optional[str] = None) -> Dict[str, Any]:
+    """Synchronous entry point for :func:`run_batch_async`."""
+    return run_sync(run_batch_async(configs, concurrency, results_path))
+
+
+def print_batch_summary(summary: Dict[str, Any]):
+    """Print batch statistics to console."""
+    print("\n" + "="*50)
+    print("📦 BATCH SUMMARY")
+    print("="*50)
+    print(f"Blogs: {summary['succeeded']}/{summary['total']} succeeded, {summary['failed']} failed")
+    print(f"Wall time: {summary['wall_seconds'] / 60:.2f} minutes")
+    print(f"Throughput: {summary['blogs_per_hour']:.2f} blogs/hour")
+    print(f"Latency p50: {summary['p50_latency_seconds']:.1f}s, p95: {summary['p95_latency_seconds']:.1f}s")
+    print("="*50)
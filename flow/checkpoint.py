@@ -0,0 +1,110 @@
+"""
+Per-stage checkpoints for the blog workflow.
+
+Each stage's output is saved under ``runs/<run_id>/<stage>.json`` as soon as
+the stage completes, together with the blog config in ``config.json``. A run
+can then be resumed by ID: finished stages are reloaded and only the missing
+ones are run again.
+"""
+
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from openai_agents.base import is_error_output
+
+RUNS_DIR = os.getenv("BLOG_RUNS_DIR", "runs")
+CONFIG_FILE = "config.json"
+
+
+class StageOutputError(RuntimeError):
+    """Raised when a stage produced an agent error string instead of output."""
+
+
+def check_stage_output(stage: str, output: Any):
+    """
+    Raise if ``output`` (or any item of a tuple/list output) is an agent
+    error string, so it is treated as a failure rather than completed output.
+    """
+    values = output if isinstance(output, (tuple, list)) else [output]
+    for value in values:
+        if is_error_output(value):
+            raise StageOutputError(f"Stage '{stage}' failed: {value}")
+
+
+def new_run_id() -> str:
+    """Return a sortable, unique run ID."""
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+class CheckpointStore:
+    """Stage outputs of one workflow run, stored as JSON files."""
+
+    def __init__(self, run_id: Optional[str] = None, root: str = RUNS_DIR):
+        """
+        Args:
+            run_id (str): Run to resume (default: start a new run)
+            root (str): Directory holding one subdirectory per run
+        """
+        self.run_id = run_id or new_run_id()
+        self.directory = os.path.join(root, self.run_id)
+        self.loaded: List[str] = []
+
+    def exists(self) -> bool:
+        return os.path.isdir(self.directory)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.json")
+
+    def _write(self, path: str, data: Dict[str, Any]):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def save_config(self, config: Dict[str, Any]):
+        """Save the blog config the run was started with."""
+        self._write(os.path.join(self.directory, CONFIG_FILE), config)
+
+    def load_config(self) -> Dict[str, Any]:
+        """Load the blog config of the run."""
+        with open(os.path.join(self.directory, CONFIG_FILE), encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, stage: str, output: Any):
+        """Persist a completed stage's output."""
+        self._write(self._path(stage), {
+            "stage": stage,
+            "saved_at": datetime.now().isoformat(),
+            "output": output,
+        })
+
+    def load(self, stage: str) -> Tuple[bool, Any]:
+        """
+        Load a stage's saved output.
+
+        Returns:
+            Tuple[bool, Any]: Whether the stage was checkpointed, and its output
+        """
+        try:
+            with open(self._path(stage), encoding="utf-8") as f:
+                output = json.load(f)["output"]
+        except FileNotFoundError:
+            return False, None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Ignoring unreadable checkpoint for stage '{stage}': {e}")
+            return False, None
+        self.loaded.append(stage)
+        return True, output
+
+    def completed(self) -> List[str]:
+        """Names of the stages checkpointed in this run."""
+        if not self.exists():
+            return []
+        return sorted(
+            name[:-len(".json")] for name in os.listdir(self.directory)
+            if name.endswith(".json") and name != CONFIG_FILE
+        )
@@ -0,0 +1,114 @@
+"""
+Dependency-graph scheduler for the blog creation workflow.
+
+Each stage declares the stages it depends on. The scheduler starts every
+stage as soon as all of its inputs are ready, so independent branches of the
+workflow run at the same time instead of one after another.
+"""
+
+import asyncio
+import inspect
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Stage:
+    """A single node in the workflow graph."""
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Any], deps: Optional[List[str]] = None):
+        """
+        Args:
+            name (str): Unique stage name, also the key of its result
+            func (Callable): Called with a dict of dependency results. May be
+                a coroutine function; plain functions are run in a worker thread
+            deps (List[str]): Names of the stages whose output this stage needs
+        """
+        self.name = name
+        self.func = func
+        self.deps = list(deps or [])
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name!r}, deps={self.deps!r})"
+
+
+def validate_stages(stages: List[Stage]) -> List[Stage]:
+    """
+    Check the graph for duplicates, unknown dependencies and cycles.
+
+    Returns:
+        List[Stage]: The stages in a valid topological order
+    """
+    by_name: Dict[str, Stage] = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"Duplicate stage name: {stage.name}")
+        by_name[stage.name] = stage
+
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    ordered: List[Stage] = []
+    state: Dict[str, str] = {}
+
+    def visit(stage: Stage, path: List[str]):
+        if state.get(stage.name) == "done":
+            return
+        if state.get(stage.name) == "visiting":
+            raise ValueError(f"Dependency cycle: {' -> '.join(path + [stage.name])}")
+        state[stage.name] = "visiting"
+        for dep in stage.deps:
+            visit(by_name[dep], path + [stage.name])
+        state[stage.name] = "done"
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage, [])
+    return ordered
+
+
+async def _call_stage(stage: Stage, inputs: Dict[str, Any]) -> Any:
+    if inspect.iscoroutinefunction(stage.func):
+        return await stage.func(inputs)
+    result = await asyncio.to_thread(stage.func, inputs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def run_stages(stages: List[Stage]) -> Dict[str, Any]:
+    """
+    Run every stage of the graph, each one as soon as its dependencies finish.
+
+    Args:
+        stages (List[Stage]): The workflow graph
+
+    Returns:
+        Dict[str, Any]: Stage name -> stage result
+
+    Raises:
+        Exception: The first stage failure. Stages that have not finished yet
+            are cancelled.
+    """
+    ordered = validate_stages(stages)
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run_one(stage: Stage) -> Any:
+        dep_results = await asyncio.gather(*(tasks[dep] for dep in stage.deps))
+        inputs = dict(zip(stage.deps, dep_results))
+        return await _call_stage(stage, inputs)
+
+    # Dependencies always come first in topological order, so every task a
+    # stage waits on already exists when the stage's task is created.
+    for stage in ordered:
+        tasks[stage.name] = asyncio.ensure_future(run_one(stage))
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+
+    return {name: task.result() for name, task in tasks.items()}
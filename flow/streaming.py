@@ -0,0 +1,50 @@
+"""
+Helpers for writing streamed agent output to disk as it is generated.
+"""
+
+import os
+import time
+from typing import AsyncIterator, Tuple
+
+
+async def stream_to_file(chunks: AsyncIterator[str], path: str, stage: str = "") -> Tuple[str, float | None]:
+    """
+    Append streamed text chunks to ``<path>.tmp`` as they arrive, then
+    atomically rename the finished file to ``path``.
+
+    Readers can follow the temp file for early content; ``path`` itself only
+    ever contains a complete output. On failure the temp file is removed.
+
+    Args:
+        chunks (AsyncIterator[str]): Text chunks, e.g. from an agent's stream_async
+        path (str): Final output file
+        stage (str): Stage name used in progress messages
+
+    Returns:
+        Tuple[str, float | None]: The full text and the time to first token in
+        seconds (None if nothing was produced)
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    start = time.perf_counter()
+    time_to_first_token = None
+    parts = []
+
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                if time_to_first_token is None:
+                    time_to_first_token = time.perf_counter() - start
+                    print(f"⏱️ {stage or path}: first token after {time_to_first_token:.2f}s")
+                f.write(chunk)
+                f.flush()
+                parts.append(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return "".join(parts), time_to_first_token
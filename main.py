@@ -1,6 +1,6 @@
+import argparse
 import sys
 import os
-from flow import agents
 from datetime import datetime
 from typing import Dict, Any
 import time
@@ -19,13 +19,49 @@ def get_default_blog_config() -> Dict[str, Any]:
         "topic": ""
     }
 
-def main():
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Generate SEO blog posts with the OpenAI Agents SDK.")
+    parser.add_argument("--batch", metavar="PATH",
+                        help="JSONL or CSV file with one blog config per line/row; unset fields use the defaults")
+    parser.add_argument("--concurrency", type=int, default=3,
+                        help="Maximum number of blogs generated at the same time in batch mode (default: 3)")
+    parser.add_argument("--results", metavar="PATH",
+                        help="JSONL file for per-blog batch results (default: output/batch_results_<timestamp>.jsonl)")
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="Resume an earlier run from its checkpoints under runs/<RUN_ID>")
+    return parser.parse_args(argv)
+
+def run_batch_mode(args: argparse.Namespace):
+    """Generate every blog listed in the batch file."""
+    from flow.batch import load_blog_configs, run_batch, print_batch_summary
+
+    configs = load_blog_configs(args.batch, defaults=get_default_blog_config())
+    print(f"Starting batch of {len(configs)} blogs with concurrency {args.concurrency}")
+    batch = run_batch(configs, concurrency=args.concurrency, results_path=args.results)
+    print_batch_summary(batch["summary"])
+    print(f"Per-blog results written to {batch['results_path']}")
+    if batch["summary"]["failed"]:
+        sys.exit(1)
+
+def main(argv=None):
     """Main function to handle the complete workflow."""
-    # Create default configuration
+    args = parse_args(argv)
+    if args.batch:
+        run_batch_mode(args)
+        return
+
+    # Imported here so that --help and argument errors do not load the agent stack
+    from flow import agents
+
     start =time.time()
-    blog_config = get_default_blog_config()
-    print(f"Starting blog creation with configuration:")
-    result = agents.orchestrate_blog_creation(blog_config)
+    if args.resume:
+        result = agents.orchestrate_blog_creation(run_id=args.resume)
+    else:
+        # Create default configuration
+        blog_config = get_default_blog_config()
+        print(f"Starting blog creation with configuration:")
+        result = agents.orchestrate_blog_creation(blog_config)
     print(f"\nBlog creation completed successfully!")
     end = time.time()
     print(f"Total time taken: {(end - start)/60:.2f} minutes")
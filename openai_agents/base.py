@@ -1,7 +1,24 @@
 import os
+import threading
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Coroutine, Iterator, Optional, TypeVar
 from dotenv import load_dotenv
-from agents import Agent, Runner
+from agents import Agent, ModelSettings, OpenAIProvider, RunConfig, Runner
+from openai import AsyncOpenAI
+from openai.types.responses import ResponseTextDeltaEvent
+from pydantic import BaseModel
 import asyncio
+import time
+
+from tools.cache import PersistentCache
+from tools.rate_limit import charge_tokens_async, rate_limit_async
+from tools.retry import RetryPolicy, acall_with_retry, retry_delay
+from tools.tokens import count_tokens
+from tools.tracing import Span, span
+
+from .usage import TokenBudgetExceeded, get_current_ledger, usage_record
 
 load_dotenv()
 
@@ -11,32 +28,348 @@ OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 if OPENAI_API_KEY:
     os.environ['OPENAI_API_KEY'] = OPENAI_API_KEY
 
+# Hard cap on output tokens per agent call; lowered further by a blog's token budget
 Max_Tokens = 32768  
+# Smallest output cap a call is made with; below it the budget counts as used up
+MIN_OUTPUT_TOKENS = int(os.getenv('TOKEN_BUDGET_MIN_OUTPUT_TOKENS', 1024))
+
+# Opt-in cache of agent responses, keyed on everything that determines the output
+RESPONSE_CACHE_ENABLED = os.getenv('OPENAI_RESPONSE_CACHE', '').lower() in ('1', 'true', 'yes')
+RESPONSE_CACHE_PATH = os.getenv('OPENAI_RESPONSE_CACHE_PATH', os.path.join('.cache', 'openai_responses.sqlite3'))
+RESPONSE_CACHE_MAX_BYTES = int(float(os.getenv('OPENAI_RESPONSE_CACHE_MAX_MB', 200)) * 1024 * 1024)
+
+# Retries for transient API errors; the deadline covers all attempts of one call
+OPENAI_RETRY_POLICY = RetryPolicy(deadline=float(os.getenv('OPENAI_CALL_DEADLINE', 600)))
+
+T = TypeVar("T")
+
+# One background event loop for the whole process: every sync caller is
+# routed onto it instead of a fresh asyncio.run(). An OpenAI client's HTTP
+# connection pool is bound to the loop it runs on, so each loop gets its own
+# client (and model provider), dropped when the loop is garbage collected.
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_thread: threading.Thread | None = None
+_loop_lock = threading.Lock()
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+_providers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, OpenAIProvider]" = weakref.WeakKeyDictionary()
+_client_lock = threading.Lock()
+_response_cache: PersistentCache | None = None
+_response_cache_override: ContextVar[Optional[bool]] = ContextVar("response_cache_override", default=None)
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared background event loop, starting it on first use."""
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(
+                target=_loop.run_forever, name="openai-agents-loop", daemon=True
+            )
+            _loop_thread.start()
+        return _loop
 
-def create_agent(name: str, instructions: str) -> Agent | None:
-    """Create an agent with the given name and instructions."""
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine on the shared event loop and block until it finishes."""
+    loop = get_event_loop()
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("run_sync() cannot be called from the shared event loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def _current_loop() -> asyncio.AbstractEventLoop:
+    """The running event loop, or the shared background loop outside of one."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return get_event_loop()
+
+
+def get_openai_client() -> AsyncOpenAI | None:
+    """Return the OpenAI client of the current event loop, creating it on first use."""
     if not OPENAI_API_KEY:
         return None
-    
+    loop = _current_loop()
+    with _client_lock:
+        client = _clients.get(loop)
+        if client is None:
+            # Retries are handled by OPENAI_RETRY_POLICY, not by the client
+            client = AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+            _clients[loop] = client
+        return client
+
+
+def get_model_provider() -> OpenAIProvider | None:
+    """Return a model provider using the current event loop's OpenAI client."""
+    client = get_openai_client()
+    if client is None:
+        return None
+    loop = _current_loop()
+    with _client_lock:
+        provider = _providers.get(loop)
+        if provider is None:
+            provider = OpenAIProvider(openai_client=client)
+            _providers[loop] = provider
+        return provider
+
+
+def get_response_cache() -> PersistentCache | None:
+    """Return the response cache if it is enabled for the current context."""
+    global _response_cache
+    enabled = _response_cache_override.get()
+    if enabled is None:
+        enabled = RESPONSE_CACHE_ENABLED
+    if not enabled:
+        return None
+    with _client_lock:
+        if _response_cache is None:
+            _response_cache = PersistentCache(RESPONSE_CACHE_PATH, max_bytes=RESPONSE_CACHE_MAX_BYTES)
+        return _response_cache
+
+
+@contextmanager
+def response_cache_enabled(enabled: Optional[bool]) -> Iterator[None]:
+    """
+    Turn the response cache on or off for agent calls made inside the block.
+
+    ``None`` falls back to the OPENAI_RESPONSE_CACHE environment setting. The
+    setting follows the current context, so it applies per workflow stage.
+    """
+    token = _response_cache_override.set(enabled)
+    try:
+        yield
+    finally:
+        _response_cache_override.reset(token)
+
+
+def _output_model(agent: Agent) -> type[BaseModel] | None:
+    """The pydantic model the agent's output is parsed into, if it has one."""
+    output_type = agent.output_type
+    if isinstance(output_type, type) and issubclass(output_type, BaseModel):
+        return output_type
+    return None
+
+
+def response_cache_key(agent: Agent, prompt: str) -> str:
+    """Hash of the agent name, instructions, model, output schema and prompt."""
+    model = agent.model if isinstance(agent.model, str) else getattr(agent.model, "model", None)
+    output_model = _output_model(agent)
+    output_schema = output_model.model_json_schema() if output_model else None
+    return PersistentCache.make_key("openai-agent", agent.name, agent.instructions, model, output_schema, prompt)
+
+
+class IncompleteResponseError(RuntimeError):
+    """Raised when a response was cut off at its output token cap."""
+
+
+@contextmanager
+def budgeted_run_config(agent: Agent, prompt: str) -> Iterator[RunConfig]:
+    """
+    Cap the call's output tokens at Max_Tokens, or at whatever is left of the
+    current blog's token budget after the prompt, if that is lower.
+
+    The prompt and output cap are reserved in the blog's ledger until the
+    block exits, so concurrent calls share the budget.
+
+    Raises:
+        TokenBudgetExceeded: Less than MIN_OUTPUT_TOKENS would be left for
+            the output, so the call is not worth making
+    """
+    max_tokens = Max_Tokens
+    reserved = 0
+    ledger = get_current_ledger()
+    if ledger is not None and ledger.budget is not None:
+        input_tokens = count_tokens(f"{agent.instructions}\n{prompt}")
+        max_tokens = ledger.reserve(input_tokens, Max_Tokens, min(MIN_OUTPUT_TOKENS, Max_Tokens))
+        reserved = input_tokens + max_tokens
+    # Models come from the current loop's client rather than a process-wide default
+    provider = get_model_provider()
+    provider_settings = {"model_provider": provider} if provider is not None else {}
+    run_config = RunConfig(model_settings=ModelSettings(max_tokens=max_tokens), **provider_settings)
+    try:
+        yield run_config
+    finally:
+        if reserved:
+            ledger.release(reserved)
+
+
+def _check_complete(agent: Agent, run_config: RunConfig, usage: Any):
+    """Raise if the response used its whole output cap, i.e. was cut off."""
+    max_tokens = run_config.model_settings.max_tokens
+    output_tokens = getattr(usage, "output_tokens", 0) or 0
+    if max_tokens and output_tokens >= max_tokens:
+        raise IncompleteResponseError(
+            f"{agent.name}: response cut off at its {max_tokens}-token output cap"
+        )
+
+
+def _record_usage(agent: Agent, call_span: Span, usage: Any = None, cached_response: bool = False):
+    """Add the call's token usage to the current ledger and trace span."""
+    ledger = get_current_ledger()
+    if ledger is not None:
+        call = ledger.record(agent.name, usage, cached_response=cached_response)
+    else:
+        call = usage_record(agent.name, usage, cached_response=cached_response)
+    call_span.set(
+        usage_input_tokens=call["input_tokens"],
+        usage_cached_input_tokens=call["cached_input_tokens"],
+        usage_output_tokens=call["output_tokens"],
+    )
+
+
+def create_agent(name: str, instructions: str, output_type: type[BaseModel] | None = None) -> Agent | None:
+    """
+    Create an agent with the given name and instructions.
+
+    With ``output_type``, the model's output is constrained to that schema
+    and the agent returns a parsed instance of it instead of text.
+    """
+    if not OPENAI_API_KEY:
+        return None
+
     return Agent(
         name=name,
         instructions=instructions,
+        output_type=output_type,
     )
 
-async def call_openai_agent(agent: Agent, prompt: str) -> str:
-    """Run an agent with the given prompt."""
+def is_error_output(output: Any) -> bool:
+    """Whether an agent returned a failure string ("[Error ...]" or "[OpenAI API key missing]") instead of output."""
+    return isinstance(output, str) and output.startswith(("[Error", "[OpenAI API key missing]"))
+
+
+async def call_openai_agent(agent: Agent, prompt: str) -> Any:
+    """
+    Run an agent with the given prompt.
+
+    Returns the output text, or a parsed model instance for agents created
+    with an ``output_type``. Transient API errors are retried under
+    ``OPENAI_RETRY_POLICY``; fatal errors, and transient ones that outlast
+    it, are raised.
+    """
     if not agent:
         return "[OpenAI API key missing]"
-    
-    try:
-        result = await Runner.run(agent, prompt)
+
+    with span(f"openai.{agent.name}", kind="llm", agent=agent.name) as call_span:
+        call_span.record_input(f"{agent.instructions}\n{prompt}")
+        cache = get_response_cache()
+        cache_key = response_cache_key(agent, prompt) if cache is not None else None
+        if cache is not None:
+            # SQLite, shared with other processes: kept off the event loop
+            cached = await asyncio.to_thread(cache.get, cache_key)
+            call_span.record_cache(cached is not None)
+            if cached is not None:
+                call_span.record_output(str(cached))
+                _record_usage(agent, call_span, cached_response=True)
+                output_model = _output_model(agent)
+                return output_model.model_validate(cached) if output_model else cached
+        
+        input_tokens = count_tokens(f"{agent.instructions}\n{prompt}")
+        with budgeted_run_config(agent, prompt) as run_config:
+
+            async def run_once():
+                # Every attempt waits for the shared OpenAI request and token quotas
+                await rate_limit_async("openai", tokens=input_tokens)
+                return await Runner.run(agent, prompt, run_config=run_config)
+
+            result = await acall_with_retry(run_once, policy=OPENAI_RETRY_POLICY, name=f"openai.{agent.name}")
+            await charge_tokens_async("openai", getattr(result.context_wrapper.usage, "output_tokens", 0))
+            _record_usage(agent, call_span, result.context_wrapper.usage)
+        _check_complete(agent, run_config, result.context_wrapper.usage)
+        # Outputs capped below Max_Tokens by a budget are not cached for runs without one
+        if cache is not None and run_config.model_settings.max_tokens == Max_Tokens:
+            output = result.final_output
+            await asyncio.to_thread(
+                cache.set, cache_key, output.model_dump(mode="json") if isinstance(output, BaseModel) else output
+            )
+        call_span.record_output(str(result.final_output))
         return result.final_output
-    except Exception as e:
-        return f"[Error calling OpenAI Agents API: {str(e)}]"
+
+class StreamStalledError(TimeoutError):
+    """Raised when a streamed generation produces no output for too long."""
+
+
+async def stream_openai_agent(agent: Agent, prompt: str, stall_timeout: Optional[float] = None) -> AsyncIterator[str]:
+    """
+    Run an agent in streaming mode and yield text chunks as they arrive.
+
+    Args:
+        agent (Agent): The agent to run
+        prompt (str): The prompt
+        stall_timeout (float): Seconds to wait for the next event before the
+            run is cancelled and StreamStalledError is raised (default: no limit)
+
+    API errors are raised, so a failed stream is never mistaken for
+    content. Transient errors are retried under ``OPENAI_RETRY_POLICY`` as
+    long as no text has been yielded yet. A stream cut off at its output
+    cap raises IncompleteResponseError once it ends.
+    """
+    if not agent:
+        yield "[OpenAI API key missing]"
+        return
+
+    with span(f"openai.{agent.name}", kind="llm", agent=agent.name, stream=True) as call_span:
+        call_span.record_input(f"{agent.instructions}\n{prompt}")
+        cache = get_response_cache()
+        cache_key = response_cache_key(agent, prompt) if cache is not None else None
+        if cache is not None:
+            # SQLite, shared with other processes: kept off the event loop
+            cached = await asyncio.to_thread(cache.get, cache_key)
+            call_span.record_cache(cached is not None)
+            if cached is not None:
+                call_span.record_output(str(cached))
+                _record_usage(agent, call_span, cached_response=True)
+                yield cached
+                return
+
+        input_tokens = count_tokens(f"{agent.instructions}\n{prompt}")
+        with budgeted_run_config(agent, prompt) as run_config:
+            started = time.monotonic()
+            attempt = 0
+            while True:
+                attempt += 1
+                await rate_limit_async("openai", tokens=input_tokens)
+                result = Runner.run_streamed(agent, prompt, run_config=run_config)
+                events = result.stream_events()
+                chunks = []
+                try:
+                    while True:
+                        try:
+                            event = await asyncio.wait_for(events.__anext__(), timeout=stall_timeout)
+                        except StopAsyncIteration:
+                            break
+                        except asyncio.TimeoutError:
+                            raise StreamStalledError(f"{agent.name}: no output for {stall_timeout}s") from None
+                        if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                            if not chunks:
+                                call_span.set(time_to_first_token_ms=round((time.monotonic() - started) * 1000, 1))
+                            chunks.append(event.data.delta)
+                            yield event.data.delta
+                    break
+                except Exception as e:
+                    # Text already written downstream cannot be taken back
+                    delay = None if chunks else retry_delay(OPENAI_RETRY_POLICY, e, attempt, started, f"openai.{agent.name}")
+                    if delay is None:
+                        raise
+                finally:
+                    if not result.is_complete:
+                        result.cancel()
+                await asyncio.sleep(delay)
+
+            await charge_tokens_async("openai", getattr(result.context_wrapper.usage, "output_tokens", 0))
+            _record_usage(agent, call_span, result.context_wrapper.usage)
+        _check_complete(agent, run_config, result.context_wrapper.usage)
+        # Outputs capped below Max_Tokens by a budget are not cached for runs without one
+        capped = run_config.model_settings.max_tokens < Max_Tokens
+        if cache is not None and isinstance(result.final_output, str) and not capped:
+            await asyncio.to_thread(cache.set, cache_key, result.final_output)
+        call_span.record_output("".join(chunks))
 
 def call_openai_sync(agent: Agent, prompt: str) -> str:
     """Synchronous wrapper for calling OpenAI agent."""
-    return asyncio.run(call_openai_agent(agent, prompt))
+    return run_sync(call_openai_agent(agent, prompt))
 
 # Legacy function for backward compatibility
 def call_openai(messages, model="gpt-4.1-mini", temperature=0.7, max_tokens=Max_Tokens):
@@ -1,4 +1,7 @@
-from .base import create_agent, call_openai_sync
+from typing import Union
+
+from .base import create_agent, call_openai_agent, run_sync
+from .schemas import TrendReport
 
 class BlogTrendResearcher:
     def __init__(self):
@@ -8,10 +11,12 @@ class BlogTrendResearcher:
             instructions="""You are a blog trend analyst specialized in identifying current trends and popular angles for content creation. 
             Your role is to analyze what's currently trending in various industries and identify angles, hooks, or perspectives 
             that would make content more engaging and relevant to current audiences. Focus on providing actionable insights 
-            about trending approaches that can make blog content more compelling and timely."""
+            about trending approaches that can make blog content more compelling and timely.""",
+            output_type=TrendReport
         )
 
-    def run(self, topic: str, keywords_result: str, current_year: str = "2025", language: str = "English") -> str:
+    async def run_async(self, topic: str, keywords_result: str, current_year: str = "2025", language: str = "English") -> Union[TrendReport, str]:
+        """Analyze trends; returns a TrendReport. Agent errors are raised."""
         if not self.agent:
             return "[OpenAI API key missing]"
             
@@ -27,40 +32,16 @@ Follow these strict steps:
    - Identify the **most popular blog formats** (e.g., listicles, how-to guides, case studies, tutorials, or multimedia-heavy posts).
    - Highlight **key subtopics, content angles, and unique themes** that are dominating the space.
    - Keep the summary detailed, insightful, and actionable for SEO-driven blog planning.
-3. Output the result in the following **precise JSON format** (with no extra formatting):
-
-{{
-  "summary": "Detailed paragraph summary based on search results covering trending content, top formats, and standout themes.",
-  "blog_titles": [
-    "Highly compelling, SEO-friendly blog titles using a keyword",
-    "Another trending title with a keyword",
-    "Outcome-focused blog with a keyword",
-    "Solution-oriented  post featuring a keyword",
-    "Transformation-focused using a keyword",
-    "Value-driven content with a keyword"
-  ]
-}}
+3. Fill in the structured output:
+   - "summary": a detailed paragraph based on the search results covering trending content, top formats, and standout themes.
+   - "blog_titles": six highly compelling, SEO-friendly blog titles (trending, outcome-focused, solution-oriented, transformation-focused and value-driven angles).
 
 Important:
-- Do not add any markdown, code formatting, or additional explanations.
-- Ensure the JSON output is the **only output**.
-- Craft each 'blog_title' to be highly compelling, SEO-friendly, and directly incorporate '{keywords_result}', aligned with trending styles for 2025 in {language} Language.
-
-Expected Output:
-{{
-  "summary": "Detailed paragraph summary based on search results covering trending content, top formats, and standout themes.",
-  "blog_titles": [
-    "Highly compelling, SEO-friendly blog titles using a keyword",
-    "Another trending title with a keyword",
-    "Outcome-focused blog with a keyword",
-    "Solution-oriented  post featuring a keyword",
-    "Transformation-focused using a keyword",
-    "Value-driven content with a keyword"
-  ]
-}}
+- Craft each blog title to directly incorporate '{keywords_result}', aligned with trending styles for 2025 in {language} Language.
 """
         
-        try:
-            return call_openai_sync(self.agent, prompt)
-        except Exception as e:
-            return f"[Error in BlogTrendResearcher agent: {str(e)}]"
+        return await call_openai_agent(self.agent, prompt)
+
+    def run(self, topic: str, keywords_result: str, current_year: str = "2025", language: str = "English") -> Union[TrendReport, str]:
+        """Synchronous wrapper for :meth:`run_async`."""
+        return run_sync(self.run_async(topic, keywords_result, current_year, language))
@@ -1,4 +1,6 @@
-from .base import create_agent, call_openai_sync
+import asyncio
+
+from .base import create_agent, call_openai_agent, run_sync
 from tools.keyword_research_tool import keyword_tool
 
 class KeywordResearcher:
@@ -13,7 +15,7 @@ class KeywordResearcher:
         )
         self.keyword_tool = keyword_tool
 
-    def generate_seed_keywords(self, topic: str, tone: str , language: str , keywords: str) -> str:
+    async def generate_seed_keywords_async(self, topic: str, tone: str , language: str , keywords: str) -> str:
         """Generate initial seed keywords for the topic."""
         if not self.agent:
             return "[OpenAI API key missing]"
@@ -29,12 +31,13 @@ Provide a clean list of 5 seed keywords or keyphrases directly related to the {t
 Format your response as a bullet point list with no additional explanation or transformation.
 """
         
-        try:
-            return call_openai_sync(self.agent, prompt)
-        except Exception as e:
-            return f"[Error in KeywordResearcher seed generation: {str(e)}]"
+        return await call_openai_agent(self.agent, prompt)
     
-    def run(self, topic: str, seed_keywords: str , tone: str , language: str) -> str:
+    def generate_seed_keywords(self, topic: str, tone: str , language: str , keywords: str) -> str:
+        """Synchronous wrapper for :meth:`generate_seed_keywords_async`."""
+        return run_sync(self.generate_seed_keywords_async(topic, tone, language, keywords))
+
+    async def run_async(self, topic: str, seed_keywords: str , tone: str , language: str) -> str:
         """Execute comprehensive keyword research."""
         if not self.agent:
             return "[OpenAI API key missing]"
@@ -42,7 +45,7 @@ Format your response as a bullet point list with no additional explanation or tr
         # Use the Google Keyword Tool to get actual keyword data
         try:
             # Get keyword ideas from Google Ads API
-            keyword_results = self.keyword_tool.search_and_format(topic, seed_keywords)
+            keyword_results = await asyncio.to_thread(self.keyword_tool.search_and_format, topic, seed_keywords)
             
             # If we got results from the tool, format them properly
             if keyword_results and keyword_results != "No keyword results available":
@@ -84,7 +87,8 @@ Provide a clean list of 10-15 SEO-friendly keyword suggestions or keyphrases.
 Format your response as a bullet point list with no additional commentary, explanation, or transformation.
 """
         
-        try:
-            return call_openai_sync(self.agent, prompt)
-        except Exception as e:
-            return f"[Error in KeywordResearcher agent: {str(e)}]"
+        return await call_openai_agent(self.agent, prompt)
+
+    def run(self, topic: str, seed_keywords: str , tone: str , language: str) -> str:
+        """Synchronous wrapper for :meth:`run_async`."""
+        return run_sync(self.run_async(topic, seed_keywords, tone, language))
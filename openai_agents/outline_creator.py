@@ -1,104 +1,130 @@
-from .base import create_agent, call_openai_sync
+from typing import Optional, Union
+
+from .base import create_agent, call_openai_agent, run_sync
+from .prompt_builder import PromptBuilder
+from .schemas import BlogOutline
+
+# Token budget for the whole outline prompt; research and trends are trimmed to fit
+OUTLINE_PROMPT_TOKEN_BUDGET = 8000
 
 class OutlineCreator:
-    def __init__(self):
+    def __init__(self, prompt_token_budget: Optional[int] = OUTLINE_PROMPT_TOKEN_BUDGET):
         """Initialize the OutlineCreator agent."""
+        self.prompt_token_budget = prompt_token_budget
         self.agent = create_agent(
             name="Blog Outline Creator",
             instructions="""You are an AI expert in generating SEO-optimized blog outlines for 2025.
             Your role is to create detailed, well-organized outlines for blog posts that incorporate research findings, 
             SEO keywords, trending angles, and product promotions in a natural way. You should generate structured 
             output that serves as an excellent blueprint for high-quality blog content with integrated FAQ sections 
-            and product recommendations."""
+            and product recommendations.""",
+            output_type=BlogOutline
         )
     
-    def run(self, keywords: str, topic: str, research_summary: str, trend_summary: str, 
+    def build_prompt(self, keywords: str, topic: str, research_summary: str, trend_summary: str, 
             audience: str = "", faq: str = "", product_name: str = "", product_url: str = "", 
             product_image_url: str = "", product_description_text: str = "", 
             product_price_min: str = "", product_price_max: str = "", 
             product_currency: str = "", language: str = "English") -> str:
-        if not self.agent:
-            return "[OpenAI API key missing]"
-            
-        prompt = f"""
-You are an AI expert in generating SEO-optimized blog outlines for 2025.
+        """Build the outline prompt, placing each input once and dropping empty ones."""
+        builder = PromptBuilder(self.prompt_token_budget)
+        builder.add_section("TOPIC", topic, trim=False)
+        builder.add_section("KEYWORDS", keywords, trim=False)
+        builder.add_section("AUDIENCE", audience, trim=False)
+        builder.add_section("RESEARCH SUMMARY", research_summary)
+        builder.add_section("TREND SUMMARY", trend_summary)
+
+        product_lines = []
+        if product_name:
+            product_lines.append(f"- name: {product_name}")
+            if product_description_text:
+                product_lines.append(f"- description: {product_description_text}")
+            if product_price_min or product_price_max:
+                price_range = "–".join(str(p) for p in (product_price_min, product_price_max) if p)
+                product_lines.append(f"- price range: {price_range} {product_currency}".rstrip())
+            if product_url:
+                product_lines.append(f"- link: {product_url}")
+            if product_image_url:
+                product_lines.append(f"- image: ![Product Image]({product_image_url})")
+        builder.add_section("PRODUCT", "\n".join(product_lines), trim=False)
 
-Inputs:
-- keywords: {keywords}
-- topic: {topic}
-- research_summary: {research_summary}
-- trend_summary: {trend_summary}
-- audience: {audience}
-- faq: {faq}
-- product_name: {product_name}
-- product_url: {product_url}
-- product_image_url: {product_image_url}
-- product_description_text: {product_description_text}
-- product_price_min: {product_price_min}
-- product_price_max: {product_price_max}
-- product_currency: {product_currency}
+        sources = " and ".join(
+            name for name in ("TREND SUMMARY", "RESEARCH SUMMARY") if builder.has(name)
+        ) or "TOPIC"
+        audience_ref = "AUDIENCE" if builder.has("AUDIENCE") else "reader"
 
+        product_instructions = ""
+        if builder.has("PRODUCT"):
+            product_instructions = """
+product:
+  - Promote the PRODUCT in context:
+    - Write a dynamic, SEO-friendly paragraph that aligns with the blog topic and audience needs.
+    - Blend the PRODUCT description naturally.
+    - Emphasize value, relevance, and benefits.
+    - MUST Include the PRODUCT price range, link and image exactly as given.
+"""
+            product_entry = f"""
+- "product": "product_title" is "{product_name}" and "description" is the persuasive, SEO-optimized product blurb built from PRODUCT, including its price range, link and image."""
+        else:
+            product_entry = """
+- "product": null."""
+
+        instructions = f"""
 Your job:
-1. Understand the main ideas from {trend_summary} and {research_summary}.
+1. Understand the main ideas from {sources}.
 2. Create a compelling and SEO-optimized blog structure tailored to 2025 search trends.
-3. Seamlessly incorporate the provided {keywords} into titles and subtopics to maximize organic visibility.
+3. Seamlessly incorporate the KEYWORDS into titles and subtopics to maximize organic visibility.
 
 Task Instructions:
-- Generate exactly 4 original, descriptive blog titles that directly reflect the ideas and structure of {trend_summary} and {research_summary} in {language} language.
+- Generate exactly 4 original, descriptive blog titles that directly reflect the ideas and structure of {sources} in {language} language.
 - For 1-2 titles (where it makes sense based on content), incorporate quotations or tabular elements (e.g., "Top 5 Ways to...", "The Ultimate Guide: 10 Steps to...", or titles with quoted phrases) to enhance engagement and SEO appeal.
 - Ensure that all titles and subtopics are strictly unique and plagiarism-free.
 - Under each title, provide exactly 3 relevant subtopics that clearly expand on the title, helping to structure the body of the blog.
 - Each subtopic must be keyword-integrated and relevant to the target audience.
-- For ONE subtopic only (where most appropriate based on {research_summary} or {trend_summary} content), include tabular data and/or expert quotes to enhance credibility and engagement. This should be naturally integrated and data-driven based on the research findings.
+- For ONE subtopic only (where most appropriate based on {sources}), include tabular data and/or expert quotes to enhance credibility and engagement. This should be naturally integrated and data-driven based on the research findings.
 - All text must be plagiarism-free, human-like, and optimized for search engines in 2025.
 - Include an FAQ section:
 - Write exactly 3 to 5 clear and relevant FAQ questions and answers.
-- Each FAQ question should be directly related to the blog's topic, aligned with the trend insights, and helpful to the {audience}.
+- Each FAQ question should be directly related to the blog's topic, aligned with the trend insights, and helpful to the {audience_ref}.
 - Each answer must provide concise, informative, and actionable information, designed for easy readability and SEO.
 - Ensure a natural and engaging tone for the FAQs, matching the tone used in the rest of the outline.
+{product_instructions}
+Fill in the structured output:
+- "sections": one entry per blog title, with its "title" and its 3 "subtopics" (keyword-integrated; mark the enhanced one with "(enhanced with tabular data/quotes)").
+  Only the selected subtopic's section has "enhanced_subtopic": "content_type" "table_and_quotes", "table_data" as a Markdown table with relevant data from research/trends, and "quotes" as expert quotes from the research or trends. Leave it null elsewhere.
+- "faq": the FAQ entries, each with "question" and "answer".{product_entry}
+"""
+        return builder.build(instructions, preamble="You are an AI expert in generating SEO-optimized blog outlines for 2025.")
 
-product_title:
-  - Promote {product_name} in context:
-    - Write a dynamic, SEO-friendly paragraph that aligns with the blog topic and audience needs.
-    - Blend the provided {product_description_text} naturally.
-    - Emphasize value, relevance, and benefits.
-    - MUST Include:
-      - Price range: {product_price_min}–{product_price_max} {product_currency}
-      - Product link: {product_url}
-      - Image: ![Product Image]({product_image_url})
-
-Return a Python list of dictionaries in the exact format:
-[
-  {{
-    "title": "Blog Title",
-    "subtopics": [
-      "Subtopic 1 with keyword",
-      "Subtopic 2 with keyword (enhanced with tabular data/quotes if this is the selected subtopic)",
-      "Subtopic 3 with keyword"
-    ],
-    "enhanced_subtopic": {{
-      "content_type": "table_and_quotes",  
-      "table_data": "Markdown table format with relevant data from research/trends",
-      "quotes": ["Expert quote 1 from research", "Expert quote 2 from trends"],
-    }}
-  }},
-  ...
-  {{
-    "faq": [
-      {{ "question": "Relevant question?", "answer": "Clear, actionable answer." }},
-      ...
-    ]
-  }},
-  {{
-    "product_title": "{product_name}",
-    "description": "Write a persuasive and SEO-optimized product blurb for {product_name}, based on the blog topic and target audience. Blend the provided product description ({product_description_text}) naturally into the paragraph. Highlight why {product_name} is a relevant and valuable recommendation. Include the price range ({product_price_min}–{product_price_max} {product_currency}), must include link to the product at {product_url}, and display the image: ![Product Image]({product_image_url})."
-  }}
-]
+    async def run_async(self, keywords: str, topic: str, research_summary: str, trend_summary: str, 
+            audience: str = "", faq: str = "", product_name: str = "", product_url: str = "", 
+            product_image_url: str = "", product_description_text: str = "", 
+            product_price_min: str = "", product_price_max: str = "", 
+            product_currency: str = "", language: str = "English") -> Union[BlogOutline, str]:
+        """Create the outline; returns a BlogOutline. Agent errors are raised."""
+        if not self.agent:
+            return "[OpenAI API key missing]"
 
-Output only the list. Do not include any extra text or formatting.
-"""
+        prompt = self.build_prompt(
+            keywords, topic, research_summary, trend_summary,
+            audience=audience, faq=faq, product_name=product_name, product_url=product_url,
+            product_image_url=product_image_url, product_description_text=product_description_text,
+            product_price_min=product_price_min, product_price_max=product_price_max,
+            product_currency=product_currency, language=language
+        )
         
-        try:
-            return call_openai_sync(self.agent, prompt)
-        except Exception as e:
-            return f"[Error in OutlineCreator agent: {str(e)}]"
+        return await call_openai_agent(self.agent, prompt)
+
+    def run(self, keywords: str, topic: str, research_summary: str, trend_summary: str, 
+            audience: str = "", faq: str = "", product_name: str = "", product_url: str = "", 
+            product_image_url: str = "", product_description_text: str = "", 
+            product_price_min: str = "", product_price_max: str = "", 
+            product_currency: str = "", language: str = "English") -> Union[BlogOutline, str]:
+        """Synchronous wrapper for :meth:`run_async`."""
+        return run_sync(self.run_async(
+            keywords, topic, research_summary, trend_summary,
+            audience=audience, faq=faq, product_name=product_name, product_url=product_url,
+            product_image_url=product_image_url, product_description_text=product_description_text,
+            product_price_min=product_price_min, product_price_max=product_price_max,
+            product_currency=product_currency, language=language
+        ))
@@ -0,0 +1,104 @@
+"""
+Prompt assembly for agents whose prompts carry large inputs.
+
+Each input is placed exactly once, in its own named section, and the task
+instructions refer to it by name. Empty inputs are dropped, and trimmable
+inputs are cut down so the whole prompt fits a per-stage token budget.
+"""
+
+from typing import List, Optional
+
+from tools.tokens import count_tokens, truncate_to_tokens
+
+TRUNCATION_MARKER = "\n[...truncated]"
+
+
+class PromptSection:
+    """A named block of input text in a prompt."""
+
+    def __init__(self, name: str, content: str, trim: bool = True):
+        self.name = name
+        self.content = content
+        self.trim = trim
+
+    def render(self) -> str:
+        return f"### {self.name}\n{self.content}"
+
+
+class PromptBuilder:
+    """Builds a prompt from named input sections and task instructions."""
+
+    def __init__(self, token_budget: Optional[int] = None):
+        """
+        Args:
+            token_budget (int): Maximum tokens for the whole prompt (default: unbounded)
+        """
+        self.token_budget = token_budget
+        self.sections: List[PromptSection] = []
+
+    def add_section(self, name: str, content: str, trim: bool = True) -> bool:
+        """
+        Add an input section; empty content is dropped.
+
+        Args:
+            name (str): Section name the instructions use to refer to it
+            content (str): Input text
+            trim (bool): Whether the section may be shortened to fit the budget
+
+        Returns:
+            bool: Whether the section was added
+        """
+        content = str(content or "").strip()
+        if not content:
+            return False
+        self.sections.append(PromptSection(name, content, trim))
+        return True
+
+    def has(self, name: str) -> bool:
+        """Whether a non-empty section called ``name`` was added."""
+        return any(section.name == name for section in self.sections)
+
+    def _fit_sections(self, available: int):
+        """
+        Shrink trimmable sections so all sections fit in ``available`` tokens.
+
+        The space left after untrimmable sections is shared fairly: sections
+        smaller than their share are kept whole and their unused share goes
+        to the larger ones, which are truncated.
+        """
+        sizes = {id(section): count_tokens(section.render()) for section in self.sections}
+        if sum(sizes.values()) <= available:
+            return
+
+        trimmable = sorted((s for s in self.sections if s.trim), key=lambda s: sizes[id(s)])
+        remaining = available - sum(sizes[id(s)] for s in self.sections if not s.trim)
+        for index, section in enumerate(trimmable):
+            share = max(0, remaining // (len(trimmable) - index))
+            size = sizes[id(section)]
+            if size > share:
+                header_tokens = count_tokens(f"### {section.name}\n") + count_tokens(TRUNCATION_MARKER)
+                section.content = truncate_to_tokens(section.content, max(0, share - header_tokens)) + TRUNCATION_MARKER
+                size = share
+            remaining -= size
+
+    def build(self, instructions: str, preamble: str = "") -> str:
+        """
+        Render the prompt: preamble, then every input section once, then the
+        task instructions.
+
+        Args:
+            instructions (str): Task instructions referring to sections by name
+            preamble (str): Short opening line(s), e.g. the agent's role
+        """
+        preamble = preamble.strip()
+        instructions = instructions.strip()
+        if self.token_budget is not None:
+            fixed = count_tokens(preamble) + count_tokens(instructions) + count_tokens("## INPUTS") + 8
+            self._fit_sections(self.token_budget - fixed)
+
+        parts = [preamble] if preamble else []
+        if self.sections:
+            parts.append("## INPUTS")
+            parts.extend(section.render() for section in self.sections)
+        parts.append(instructions)
+        return "\n\n".join(parts) + "\n"
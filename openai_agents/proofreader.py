@@ -1,4 +1,38 @@
-from .base import create_agent, call_openai_sync
+import asyncio
+from typing import AsyncIterator, List, Optional
+
+from tools.markdown_utils import count_words, section_opening, split_blocks, split_h2_sections
+
+from .base import create_agent, call_openai_agent, is_error_output, run_sync, stream_openai_agent
+from .schemas import SeamEdits
+
+# Editing rules shared by whole-draft and per-chunk proofreading
+STYLE_RULES = """**Editing Rules:**
+1. Correct grammar, punctuation, spelling, and awkward phrasing.
+2. Enhance clarity and flow without altering meaning.
+3. Maintain SEO keyword usage; do not overuse.
+4. Ensure product references are neutral and factual, not promotional.
+5. Eliminate filler, clichés, and generic AI phrases (e.g., "ChatGPT-isms").
+
+**Mandatory Style Guide (Rewrite or Delete):**
+- **Forbidden Phrases:** "has/have emerged", "In today's... world", "In this age of...", "when it comes to", "your premier destination", "whether you...".
+- **Forbidden Language:** Self-referential ("we pride ourselves"), imperative commands ("Discover," "Explore").
+- **Words to Replace/Remove:** "tailored", "vibrant", "cutting-edge", "solutions", "unique", "landscape", "comprehensive".
+
+"""
+
+
+def seo_section(seo_issues: str, note: str = "") -> str:
+    """Prompt block listing SEO issues found by the local analyzer (empty when there are none)."""
+    if not seo_issues.strip():
+        return ""
+    note = f" {note}" if note else ""
+    return f"""
+**SEO Issues to Fix:**
+The SEO analysis of the draft found these issues.{note} Fix them without breaking the rules above.
+{seo_issues.strip()}
+"""
+
 
 class Proofreader:
     def __init__(self):
@@ -54,11 +88,16 @@ class Proofreader:
             Goal: Deliver a fully refined, grammatically flawless, and SEO-optimized blog post in markdown format 
             that strictly follows the provided outline and meets the exact word count requirement."""
         )
+        self.seam_agent = create_agent(
+            name="Blog Seam Editor",
+            instructions="""You are a blog editor doing the last pass over a post whose sections were proofread
+            separately. You smooth the transitions between sections and write the closing call to action,
+            changing as little as possible.""",
+            output_type=SeamEdits
+        )
     
-    def run(self, draft: str, word_count: int , audience: str , url: str) -> str:
-        if not self.agent:
-            return "[OpenAI API key missing]"
-            
+    def build_prompt(self, draft: str, word_count: int , audience: str , url: str, seo_issues: str = "") -> str:
+        """Build the proofreading prompt, listing any SEO issues found in the draft."""
         prompt = f"""
 As an editor AI, proofread and polish the draft blog post for publication.
 Adhere strictly to all rules below. The final output must be publication-ready.
@@ -72,19 +111,7 @@ Draft Blog Content:
 - Adhere to the {word_count} word limit.
 - Match the {audience} writing style.
 
-**Editing Rules:**
-1. Correct grammar, punctuation, spelling, and awkward phrasing.
-2. Enhance clarity and flow without altering meaning.
-3. Maintain SEO keyword usage; do not overuse.
-4. Ensure product references are neutral and factual, not promotional.
-5. Eliminate filler, clichés, and generic AI phrases (e.g., "ChatGPT-isms").
-
-**Mandatory Style Guide (Rewrite or Delete):**
-- **Forbidden Phrases:** "has/have emerged", "In today's... world", "In this age of...", "when it comes to", "your premier destination", "whether you...".
-- **Forbidden Language:** Self-referential ("we pride ourselves"), imperative commands ("Discover," "Explore").
-- **Words to Replace/Remove:** "tailored", "vibrant", "cutting-edge", "solutions", "unique", "landscape", "comprehensive".
-
-**Additional Requirements:**
+{STYLE_RULES}**Additional Requirements:**
 - Grammar & Style: Correct all errors and enhance sentence structures for natural, smooth reading
 - Readability & Flow: Improve transitions and break up dense text appropriately
 - SEO Optimization: Seamlessly integrate keywords without stuffing
@@ -94,10 +121,142 @@ Draft Blog Content:
 - Word Count: Strictly adhere to {word_count} words (±5 words maximum)
 - Originality: 100% original content, avoid generic AI phrasing
 
+{seo_section(seo_issues)}
 Expected Output: A fully polished, human-quality, SEO-aligned blog post ready for publication.
 """
+        return prompt
+
+    async def run_async(self, draft: str, word_count: int , audience: str , url: str, seo_issues: str = "") -> str:
+        if not self.agent:
+            return "[OpenAI API key missing]"
+
+        prompt = self.build_prompt(draft, word_count, audience, url, seo_issues)
         
+        return await call_openai_agent(self.agent, prompt)
+
+    def run(self, draft: str, word_count: int , audience: str , url: str, seo_issues: str = "") -> str:
+        """Synchronous wrapper for :meth:`run_async`."""
+        return run_sync(self.run_async(draft, word_count, audience, url, seo_issues))
+
+    async def stream_async(self, draft: str, word_count: int , audience: str , url: str, seo_issues: str = "",
+                           stall_timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Yield the proofread blog in chunks as the model generates it."""
+        prompt = self.build_prompt(draft, word_count, audience, url, seo_issues)
+        async for chunk in stream_openai_agent(self.agent, prompt, stall_timeout=stall_timeout):
+            yield chunk
+
+    def build_chunk_prompt(self, chunk: str, chunk_word_count: int, audience: str,
+                           position: int, total: int, seo_issues: str = "") -> str:
+        """Build the prompt for proofreading one H2 section of a chunked draft."""
+        return f"""
+As an editor AI, proofread and polish section {position} of {total} of a draft blog post.
+The other sections are proofread separately, so edit only this one.
+
+Section Content:
+{chunk}
+
+**Constraints:**
+- Preserve the section's headings exactly; output only this section.
+- Do not add new content, introductions, conclusions or calls to action.
+- Keep the section at about {chunk_word_count} words.
+- Match the {audience} writing style.
+
+{STYLE_RULES}{seo_section(seo_issues, "Fix those that apply to this section.")}
+Expected Output: The polished section in markdown, ready for publication.
+"""
+
+    def build_seam_prompt(self, chunks: List[str], audience: str, url: str) -> str:
+        """Build the prompt for the final pass over the joins between proofread chunks."""
+        seams = []
+        for index in range(1, len(chunks)):
+            _, opening = section_opening(chunks[index])
+            if not opening:
+                continue
+            previous_ending = split_blocks(chunks[index - 1])[-1]
+            heading = chunks[index].splitlines()[0]
+            seams.append(
+                f"### Seam {index}\n"
+                f"End of previous section:\n{previous_ending}\n\n"
+                f"Section {index} heading: {heading}\n"
+                f"Section {index} opening paragraph:\n{opening}"
+            )
+        seam_text = "\n\n".join(seams) or "(no section opens with a paragraph)"
+        link = f" linking to {url}" if url else ""
+        return f"""
+The sections of this blog were proofread separately. Below are the joins between them.
+
+{seam_text}
+
+### Final section
+{chunks[-1]}
+
+Tasks:
+1. For each seam whose opening paragraph does not follow naturally from the previous section,
+   return it in "transitions" with a revised opening paragraph (same facts, about the same length).
+   Leave seams that already flow well out.
+2. Write "call_to_action": one short, compelling closing paragraph for the {audience} reader{link}
+   that follows from the final section.
+{STYLE_RULES}"""
+
+    async def _proofread_chunk(self, chunk: str, chunk_word_count: int, audience: str,
+                               position: int, total: int, seo_issues: str = "") -> str:
+        prompt = self.build_chunk_prompt(chunk, chunk_word_count, audience, position, total, seo_issues)
         try:
-            return call_openai_sync(self.agent, prompt)
+            text = await call_openai_agent(self.agent, prompt)
         except Exception as e:
-            return f"[Error in Proofreader agent: {str(e)}]"
+            text = f"[Error in Proofreader agent: {str(e)}]"
+        if is_error_output(text):
+            print(f"⚠️ Proofreading section {position} failed, keeping the draft text: {text}")
+            return chunk
+        return text.strip()
+
+    async def run_chunked_async(self, draft: str, word_count: int , audience: str , url: str, seo_issues: str = "") -> str:
+        """
+        Proofread the draft one H2 section at a time, concurrently, then run
+        a short final pass that smooths the joins and adds the call to action.
+
+        Short drafts with a single section are proofread in one call.
+        """
+        if not self.agent:
+            return "[OpenAI API key missing]"
+
+        chunks = split_h2_sections(draft)
+        if len(chunks) < 2:
+            return await self.run_async(draft, word_count, audience, url, seo_issues)
+
+        draft_words = max(1, count_words(draft))
+        print(f"📝 Proofreading {len(chunks)} sections concurrently")
+        chunks = list(await asyncio.gather(*(
+            self._proofread_chunk(
+                chunk, max(1, round(word_count * count_words(chunk) / draft_words)),
+                audience, position, len(chunks), seo_issues
+            )
+            for position, chunk in enumerate(chunks, 1)
+        )))
+
+        try:
+            edits = await call_openai_agent(self.seam_agent, self.build_seam_prompt(chunks, audience, url))
+        except Exception as e:
+            edits = f"[Error in Proofreader seam pass: {str(e)}]"
+        if not isinstance(edits, SeamEdits):
+            print(f"⚠️ Final proofreading pass failed, publishing sections as proofread: {edits}")
+            return "\n\n".join(chunks)
+
+        for transition in edits.transitions:
+            index = transition.section_index
+            if not 0 < index < len(chunks) or not transition.opening_paragraph.strip():
+                continue
+            block_index, _ = section_opening(chunks[index])
+            if block_index < 0:
+                continue
+            blocks = split_blocks(chunks[index])
+            blocks[block_index] = transition.opening_paragraph.strip()
+            chunks[index] = "\n\n".join(blocks)
+        if edits.call_to_action.strip():
+            chunks[-1] = chunks[-1] + "\n\n" + edits.call_to_action.strip()
+        return "\n\n".join(chunks)
+
+    async def stream_chunked_async(self, draft: str, word_count: int , audience: str , url: str,
+                                   seo_issues: str = "") -> AsyncIterator[str]:
+        """Chunked proofreading for streaming callers; the blog is yielded once the final pass is done."""
+        yield await self.run_chunked_async(draft, word_count, audience, url, seo_issues)
@@ -1,10 +1,19 @@
-from .base import create_agent, call_openai_sync
-from tools.web_search_tool import WebSearchTool
+import asyncio
+from typing import Optional
+
+from .base import create_agent, call_openai_agent, run_sync
+from tools.dedup import dedupe_results
+from tools.web_search_tool import web_search_tool
+
+# Token budget for the search data in the research prompt, whatever the search fan-out
+RESEARCH_SEARCH_TOKEN_BUDGET = 3000
 
 class Researcher:
-    def __init__(self):
+    def __init__(self, search_token_budget: Optional[int] = RESEARCH_SEARCH_TOKEN_BUDGET):
         """Initialize the Researcher agent."""
-        self.web_search = WebSearchTool()
+        self.search_token_budget = search_token_budget
+        # Shared instance, so every blog reuses the same pooled Serper connections
+        self.web_search = web_search_tool
         self.agent = create_agent(
             name="Research Assistant",
             instructions="""You are a helpful research assistant specialized in gathering comprehensive and accurate information. 
@@ -13,7 +22,7 @@ class Researcher:
             creating high-quality blog posts."""
         )
     
-    def run(self, topic: str, keywords: str = "") -> str:
+    async def run_async(self, topic: str, keywords: str = "") -> str:
         if not self.agent:
             return "[OpenAI API key missing]"
         
@@ -25,19 +34,26 @@ class Researcher:
             f"{topic} industry insights"
         ]
         
+        # Also search for recent news
+        search_requests = [{"query": query.strip(), "num_results": 3} for query in search_queries]
+        search_requests.append({"query": f"{topic} {keywords}".strip(), "num_results": 3, "type": "news"})
+        
+        # The web queries go out as one batched request, alongside the news query
         search_results = []
-        for query in search_queries:
-            results = self.web_search.search(query.strip(), num_results=3)
+        for results in await asyncio.to_thread(self.web_search.search_many, search_requests):
             if results and not (len(results) == 1 and 'error' in results[0]):
                 search_results.extend(results)
         
-        # Also search for recent news
-        news_results = self.web_search.search_news(f"{topic} {keywords}".strip(), num_results=3)
-        if news_results and not (len(news_results) == 1 and 'error' in news_results[0]):
-            search_results.extend(news_results)
+        # Merge copies of the same page or article, keeping all their links
+        deduped_results = dedupe_results(search_results)
+        if len(deduped_results) < len(search_results):
+            print(f"🧹 Merged {len(search_results) - len(deduped_results)} duplicate search results")
+        search_results = deduped_results
         
         # Format search results for the AI
-        formatted_search_data = self.web_search.format_search_results(search_results)
+        formatted_search_data = self.web_search.format_search_results(
+            search_results, token_budget=self.search_token_budget, queries=search_queries
+        )
         
         prompt = f"""
 Based on the following real-time search data, perform a detailed and systematic research investigation on the topic '{topic}', emphasizing the keywords: {keywords}.
@@ -56,7 +72,8 @@ Expected Output:
 Provide a structured research summary in a single, continuous paragraph that introduces the context and scope of the topic, presents main insights and key information discovered during the research, highlights emerging trends and developments, includes supporting evidence such as data points or cited sources when applicable, and notes controversies, challenges, or gaps in the topic. Use clear and concise language suitable for both technical and non-technical audiences.
 """
         
-        try:
-            return call_openai_sync(self.agent, prompt)
-        except Exception as e:
-            return f"[Error in Researcher agent: {str(e)}]"
+        return await call_openai_agent(self.agent, prompt)
+
+    def run(self, topic: str, keywords: str = "") -> str:
+        """Synchronous wrapper for :meth:`run_async`."""
+        return run_sync(self.run_async(topic, keywords))
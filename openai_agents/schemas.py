@@ -0,0 +1,77 @@
+"""
+Typed output schemas for agents that return structured data.
+
+These are passed to the Agents SDK as ``output_type``, so the model is
+constrained to the schema and the SDK returns parsed model instances.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class TrendReport(BaseModel):
+    """Output of the BlogTrendResearcher."""
+
+    summary: str = Field(description="Detailed paragraph covering trending content, top formats and standout themes")
+    blog_titles: List[str] = Field(description="Compelling, SEO-friendly blog titles that each use a keyword")
+
+
+class EnhancedSubtopic(BaseModel):
+    """Table and quotes that enrich one subtopic of the outline."""
+
+    content_type: str = Field(description='Kind of enhancement, e.g. "table_and_quotes"')
+    table_data: str = Field(description="Markdown table with relevant data from research/trends")
+    quotes: List[str] = Field(description="Expert quotes from the research or trends")
+
+
+class OutlineSection(BaseModel):
+    """One H2 section of the blog outline."""
+
+    title: str
+    subtopics: List[str]
+    enhanced_subtopic: Optional[EnhancedSubtopic] = None
+
+
+class FAQItem(BaseModel):
+    question: str
+    answer: str
+
+
+class ProductBlurb(BaseModel):
+    product_title: str
+    description: str
+
+
+class BlogOutline(BaseModel):
+    """Output of the OutlineCreator."""
+
+    sections: List[OutlineSection]
+    faq: List[FAQItem]
+    product: Optional[ProductBlurb] = None
+
+    def to_outline_list(self, include_faq: bool = True, include_product: bool = True) -> List[Dict[str, Any]]:
+        """
+        Convert to the list-of-dicts outline format the Writer consumes:
+        one dict per section, then a ``{"faq": [...]}`` entry and a product entry.
+        """
+        outline: List[Dict[str, Any]] = [section.model_dump(exclude_none=True) for section in self.sections]
+        if include_faq and self.faq:
+            outline.append({"faq": [item.model_dump() for item in self.faq]})
+        if include_product and self.product:
+            outline.append(self.product.model_dump())
+        return outline
+
+
+class SectionTransition(BaseModel):
+    """A rewritten opening paragraph that links a section to the one before it."""
+
+    section_index: int = Field(description="Index of the section whose opening paragraph is rewritten")
+    opening_paragraph: str = Field(description="The section's opening paragraph, revised for a smooth transition")
+
+
+class SeamEdits(BaseModel):
+    """Output of the final pass over a blog proofread in chunks."""
+
+    transitions: List[SectionTransition] = Field(description="Revised openings; omit sections that already flow well")
+    call_to_action: str = Field(description="One short closing paragraph with the call to action")
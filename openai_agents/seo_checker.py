@@ -1,4 +1,4 @@
-from .base import create_agent, call_openai_sync
+from .base import create_agent, call_openai_agent, run_sync
 
 class SEOChecker:
     def __init__(self):
@@ -11,7 +11,7 @@ class SEOChecker:
             the content remains natural and valuable for human readers."""
         )
     
-    def run(self, draft: str, keywords: str) -> str:
+    async def run_async(self, draft: str, keywords: str) -> str:
         if not self.agent:
             return "[OpenAI API key missing]"
             
@@ -50,7 +50,8 @@ Make sure to:
 SEO Analysis and Improved Blog Post:
 """
         
-        try:
-            return call_openai_sync(self.agent, prompt)
-        except Exception as e:
-            return f"[Error in SEOChecker agent: {str(e)}]"
+        return await call_openai_agent(self.agent, prompt)
+
+    def run(self, draft: str, keywords: str) -> str:
+        """Synchronous wrapper for :meth:`run_async`."""
+        return run_sync(self.run_async(draft, keywords))
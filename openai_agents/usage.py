@@ -0,0 +1,220 @@
+"""
+Token usage accounting and per-blog token budgets for agent calls.
+
+A UsageLedger is activated for one blog run; every agent call made inside
+it records the token usage reported by the SDK, labelled with the workflow
+stage that made the call. The ledger also caps each call's output tokens to
+what is left of the budget.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+# Optional prices in USD per million tokens, used for cost estimates
+TOKEN_PRICES_PER_MILLION = {
+    "input": float(os.getenv("OPENAI_PRICE_INPUT_PER_1M", 0) or 0),
+    "cached_input": float(os.getenv("OPENAI_PRICE_CACHED_INPUT_PER_1M", 0) or 0),
+    "output": float(os.getenv("OPENAI_PRICE_OUTPUT_PER_1M", 0) or 0),
+}
+
+BUDGET_POLICIES = ("degrade", "abort")
+
+_current_ledger: ContextVar[Optional["UsageLedger"]] = ContextVar("current_usage_ledger", default=None)
+_current_stage: ContextVar[Optional[str]] = ContextVar("current_usage_stage", default=None)
+
+
+class TokenBudgetExceeded(RuntimeError):
+    """Raised when a blog run has used up its token budget."""
+
+
+def usage_record(agent_name: str, usage: Any = None, cached_response: bool = False) -> Dict[str, Any]:
+    """Flatten an SDK ``Usage`` object into a call record labelled with the current stage."""
+    input_details = getattr(usage, "input_tokens_details", None)
+    return {
+        "stage": _current_stage.get(),
+        "agent": agent_name,
+        "requests": getattr(usage, "requests", 0) or 0,
+        "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+        "cached_input_tokens": getattr(input_details, "cached_tokens", 0) or 0,
+        "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+        "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+        "cached_response": cached_response,
+    }
+
+
+class UsageLedger:
+    """Token usage of every agent call in one blog run, with an optional budget."""
+
+    def __init__(self, budget: Optional[int] = None, policy: str = "degrade"):
+        """
+        Args:
+            budget (int): Maximum total tokens (input + output) for the run
+            policy (str): What a stage does once the budget is used up:
+                "degrade" skips optional work, "abort" fails the run
+        """
+        if policy not in BUDGET_POLICIES:
+            raise ValueError(f"token budget policy should be one of {BUDGET_POLICIES}")
+        self.budget = budget
+        self.policy = policy
+        self.calls: List[Dict[str, Any]] = []
+        self.degraded_stages: List[str] = []
+        self._reserved = 0
+        self._lock = threading.Lock()
+
+    def record(self, agent_name: str, usage: Any = None, cached_response: bool = False) -> Dict[str, Any]:
+        """
+        Record one agent call.
+
+        Args:
+            agent_name (str): Name of the agent that was run
+            usage: The SDK ``Usage`` object of the run (None for cache hits)
+            cached_response (bool): The response came from the response cache
+
+        Returns:
+            Dict: The recorded call
+        """
+        call = usage_record(agent_name, usage, cached_response)
+        with self._lock:
+            self.calls.append(call)
+        return call
+
+    def used(self) -> int:
+        """Total tokens used so far."""
+        with self._lock:
+            return sum(call["total_tokens"] for call in self.calls)
+
+    def remaining(self) -> Optional[int]:
+        """Tokens left in the budget (None when there is no budget)."""
+        if self.budget is None:
+            return None
+        return max(0, self.budget - self.used())
+
+    def reserve(self, input_tokens: int, max_output_tokens: int, min_output_tokens: int) -> int:
+        """
+        Reserve budget for one call before it is made, so that concurrent
+        calls share what is left instead of each being allowed all of it.
+
+        Args:
+            input_tokens (int): Tokens of the call's prompt
+            max_output_tokens (int): Output cap the call wants
+            min_output_tokens (int): Smallest output cap worth making the call with
+
+        Returns:
+            int: The call's output cap; release ``input_tokens`` plus this
+            with :meth:`release` once the call's usage is recorded
+
+        Raises:
+            TokenBudgetExceeded: Less than ``min_output_tokens`` is left
+        """
+        with self._lock:
+            used = sum(call["total_tokens"] for call in self.calls)
+            available = self.budget - used - self._reserved - input_tokens
+            if available < min_output_tokens:
+                raise TokenBudgetExceeded(
+                    f"Token budget of {self.budget} too low for another call "
+                    f"({used} used, {self._reserved} reserved, {input_tokens} needed for the prompt)"
+                )
+            max_output_tokens = min(max_output_tokens, available)
+            self._reserved += input_tokens + max_output_tokens
+            return max_output_tokens
+
+    def release(self, tokens: int):
+        """Return tokens reserved with :meth:`reserve`."""
+        with self._lock:
+            self._reserved = max(0, self._reserved - tokens)
+
+    def exceeded(self) -> bool:
+        return self.budget is not None and self.used() >= self.budget
+
+    def check(self, stage: str, can_degrade: bool = True) -> bool:
+        """
+        Decide whether ``stage`` may start.
+
+        Args:
+            stage (str): Name of the stage
+            can_degrade (bool): Whether the stage can produce a result
+                without agent calls
+
+        Returns:
+            bool: True if the stage can run normally, False if it should
+            degrade (skip its optional work; call :meth:`mark_degraded` once
+            it has)
+
+        Raises:
+            TokenBudgetExceeded: The budget is used up and the policy is
+            "abort" or the stage cannot degrade
+        """
+        if not self.exceeded():
+            return True
+        if self.policy == "abort" or not can_degrade:
+            raise TokenBudgetExceeded(
+                f"Token budget of {self.budget} exhausted ({self.used()} used) before stage '{stage}'"
+            )
+        return False
+
+    def mark_degraded(self, stage: str):
+        """Record that ``stage`` produced its result without agent calls."""
+        with self._lock:
+            self.degraded_stages.append(stage)
+
+    @staticmethod
+    def _sum(calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+        totals = {
+            key: sum(call[key] for call in calls)
+            for key in ("requests", "input_tokens", "cached_input_tokens", "output_tokens", "total_tokens")
+        }
+        totals["calls"] = len(calls)
+        totals["cached_responses"] = sum(1 for call in calls if call["cached_response"])
+        if any(TOKEN_PRICES_PER_MILLION.values()):
+            uncached_input = totals["input_tokens"] - totals["cached_input_tokens"]
+            totals["estimated_cost_usd"] = round((
+                uncached_input * TOKEN_PRICES_PER_MILLION["input"]
+                + totals["cached_input_tokens"] * TOKEN_PRICES_PER_MILLION["cached_input"]
+                + totals["output_tokens"] * TOKEN_PRICES_PER_MILLION["output"]
+            ) / 1_000_000, 6)
+        return totals
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Totals for the run and per stage, plus every recorded call."""
+        with self._lock:
+            calls = list(self.calls)
+            degraded = list(self.degraded_stages)
+        stages: Dict[str, List[Dict[str, Any]]] = {}
+        for call in calls:
+            stages.setdefault(call["stage"] or "unknown", []).append(call)
+        return {
+            "total": self._sum(calls),
+            "by_stage": {stage: self._sum(stage_calls) for stage, stage_calls in stages.items()},
+            "budget": self.budget,
+            "budget_policy": self.policy,
+            "degraded_stages": degraded,
+            "calls": calls,
+        }
+
+
+def get_current_ledger() -> Optional[UsageLedger]:
+    """Return the ledger active in the current context, if any."""
+    return _current_ledger.get()
+
+
+@contextmanager
+def track_usage(ledger: UsageLedger) -> Iterator[UsageLedger]:
+    """Record the usage of every agent call made inside the block in ``ledger``."""
+    token = _current_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _current_ledger.reset(token)
+
+
+@contextmanager
+def usage_stage(stage: str) -> Iterator[None]:
+    """Label agent calls made inside the block with ``stage``."""
+    token = _current_stage.set(stage)
+    try:
+        yield
+    finally:
+        _current_stage.reset(token)
@@ -0,0 +1,140 @@
+import asyncio
+import re
+from typing import List
+
+from tools.markdown_utils import count_words, split_h2_sections, split_lead
+
+from .base import create_agent, call_openai_agent, is_error_output, run_sync
+from .writer import share_word_count
+
+# Allowed deviation from the target word count, as a fraction of the target
+WORD_COUNT_TOLERANCE = 0.05
+
+
+def section_word_budgets(sections: List[str], word_count: int) -> List[int]:
+    """
+    Share ``word_count`` across H2 sections with the Writer's weights (see
+    :func:`outline_parts`): one for the introduction, the conclusion and a
+    product, half the number of questions for the FAQ, and one plus the
+    number of H3 subtopics for a body section. ``sections`` must not include
+    a title or lead paragraph (see :func:`split_lead`).
+    """
+    parts = []
+    for section in sections:
+        heading = section.splitlines()[0].lstrip("#").strip().lower() if section else ""
+        subtopics = len(re.findall(r"(?m)^###\s", section))
+        if heading in ("introduction", "conclusion"):
+            parts.append({"kind": heading, "weight": 1})
+        elif "faq" in heading or "frequently asked questions" in heading:
+            parts.append({"kind": "faq", "weight": max(1, subtopics // 2)})
+        else:
+            parts.append({"kind": "section", "weight": 1 + subtopics})
+    if not any(part["kind"] == "section" for part in parts):
+        for part in parts:
+            part["kind"] = "section"
+    return share_word_count(parts, word_count)
+
+
+class WordCountEditor:
+    def __init__(self, tolerance: float = WORD_COUNT_TOLERANCE):
+        """Initialize the WordCountEditor agent."""
+        self.tolerance = tolerance
+        self.agent = create_agent(
+            name="Blog Length Editor",
+            instructions="""You are a blog editor who adjusts the length of one section of a blog post.
+            You expand a section with relevant detail or trim it by removing repetition and filler,
+            keeping its headings, facts, links, images, tone and formatting unchanged."""
+        )
+
+    def build_prompt(self, section: str, current_words: int, target_words: int) -> str:
+        """Build the prompt for expanding or trimming one section."""
+        if target_words > current_words:
+            task = (f"Expand this section from {current_words} to about {target_words} words by developing "
+                    f"its existing points with concrete detail, examples or explanation. Do not add new headings.")
+        else:
+            task = (f"Trim this section from {current_words} to about {target_words} words by removing "
+                    f"repetition, filler and less important detail.")
+        return f"""
+{task}
+
+Section:
+{section}
+
+Rules:
+- Keep every heading exactly as it is, in the same order.
+- Keep all facts, links, images, tables and lists intact.
+- Keep the tone, language and markdown formatting.
+- Headings, link URLs and image syntax do not count as words.
+
+Return only the revised section in markdown.
+"""
+
+    async def resize_section_async(self, section: str, target_words: int) -> str:
+        """Expand or trim one section towards ``target_words``; the original is kept on failure."""
+        current_words = count_words(section)
+        try:
+            text = await call_openai_agent(self.agent, self.build_prompt(section, current_words, target_words))
+        except Exception as e:
+            text = f"[Error in WordCountEditor agent: {str(e)}]"
+        if is_error_output(text):
+            print(f"⚠️ Could not resize section, keeping it as is: {text}")
+            return section
+        return text.strip()
+
+    def off_budget_sections(self, sections: List[str], word_count: int) -> List[int]:
+        """
+        Indices of the sections to correct: those missing their budget by
+        more than the tolerance in the same direction as the whole post.
+        ``sections`` and ``word_count`` cover the body only, without the lead.
+        """
+        total = sum(count_words(section) for section in sections)
+        budgets = section_word_budgets(sections, word_count)
+        direction = 1 if total < word_count else -1
+        return [
+            index for index, (section, budget) in enumerate(zip(sections, budgets))
+            if (budget - count_words(section)) * direction > max(1, self.tolerance * budget)
+        ]
+
+    async def run_async(self, markdown: str, word_count: int, max_rounds: int = 1) -> str:
+        """
+        Bring a markdown blog within the tolerance of ``word_count`` by
+        expanding or trimming only the sections that are off budget,
+        concurrently. The blog is returned unchanged when it already fits.
+
+        Args:
+            markdown (str): Blog in markdown
+            word_count (int): Target word count
+            max_rounds (int): Maximum correction rounds
+
+        Returns:
+            str: The corrected blog
+        """
+        if not self.agent or not word_count:
+            return markdown
+
+        for _ in range(max_rounds):
+            total = count_words(markdown)
+            if abs(total - word_count) <= self.tolerance * word_count:
+                break
+            # The title and lead are left as they are and only take their words off the target
+            lead, body = split_lead(markdown)
+            sections = split_h2_sections(body)
+            body_word_count = max(0, word_count - count_words(lead))
+            if not sections or not body_word_count:
+                break
+            targets = section_word_budgets(sections, body_word_count)
+            indices = self.off_budget_sections(sections, body_word_count)
+            if not indices:
+                break
+            print(f"📏 Blog is {total} words (target {word_count}); resizing {len(indices)} of {len(sections)} sections")
+            resized = await asyncio.gather(*(
+                self.resize_section_async(sections[index], targets[index]) for index in indices
+            ))
+            for index, text in zip(indices, resized):
+                sections[index] = text
+            markdown = "\n\n".join(([lead] if lead else []) + sections)
+        return markdown
+
+    def run(self, markdown: str, word_count: int, max_rounds: int = 1) -> str:
+        """Synchronous wrapper for :meth:`run_async`."""
+        return run_sync(self.run_async(markdown, word_count, max_rounds))
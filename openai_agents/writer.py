@@ -1,8 +1,80 @@
-from .base import create_agent, call_openai_sync
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .base import create_agent, call_openai_agent, is_error_output, run_sync, stream_openai_agent
+from .prompt_builder import PromptBuilder
+
+# Token budget for the whole Writer prompt; research and trends are trimmed to fit
+WRITER_PROMPT_TOKEN_BUDGET = 12000
+# Token budget for each prompt in section mode, which sends one prompt per part
+WRITER_SECTION_PROMPT_TOKEN_BUDGET = 6000
+
+
+def outline_parts(outline: str) -> List[Dict[str, Any]]:
+    """
+    Split a serialized outline into the parts written in section mode.
+
+    Args:
+        outline (str): JSON list of outline entries (sections, then FAQ/product entries)
+
+    Returns:
+        List[Dict]: Parts in blog order, each with a "kind" (introduction,
+        section, faq, product or conclusion), its "heading", the outline
+        "content" it covers and a "weight" used to share out the word count
+    """
+    entries = json.loads(outline)
+    if not isinstance(entries, list):
+        raise ValueError("outline should be a list of entries")
+
+    parts = [{"kind": "introduction", "heading": "Introduction", "content": "", "weight": 1}]
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        if "faq" in entry:
+            parts.append({
+                "kind": "faq", "heading": "Frequently Asked Questions",
+                "content": json.dumps(entry["faq"], ensure_ascii=False),
+                "weight": max(1, len(entry["faq"]) // 2),
+            })
+        elif "product_title" in entry:
+            parts.append({
+                "kind": "product", "heading": entry["product_title"],
+                "content": json.dumps(entry, ensure_ascii=False), "weight": 1,
+            })
+        elif entry.get("title"):
+            parts.append({
+                "kind": "section", "heading": entry["title"],
+                "content": json.dumps(entry, ensure_ascii=False),
+                "weight": 1 + len(entry.get("subtopics", [])),
+            })
+    if not any(part["kind"] == "section" for part in parts):
+        raise ValueError("outline has no sections")
+    parts.append({"kind": "conclusion", "heading": "Conclusion", "content": "", "weight": 1})
+    return parts
+
+
+def share_word_count(parts: List[Dict[str, Any]], word_count: int) -> List[int]:
+    """Split ``word_count`` across ``parts`` in proportion to their weights."""
+    total_weight = sum(part["weight"] for part in parts)
+    budgets = [word_count * part["weight"] // total_weight for part in parts]
+    # Hand the rounding remainder to the body sections, largest first
+    remainder = word_count - sum(budgets)
+    body = sorted(
+        (i for i, part in enumerate(parts) if part["kind"] == "section"),
+        key=lambda i: -parts[i]["weight"],
+    )
+    for i in range(remainder):
+        budgets[body[i % len(body)]] += 1
+    return budgets
+
 
 class Writer:
-    def __init__(self):
+    def __init__(self, prompt_token_budget: Optional[int] = WRITER_PROMPT_TOKEN_BUDGET,
+                 section_prompt_token_budget: Optional[int] = WRITER_SECTION_PROMPT_TOKEN_BUDGET):
         """Initialize the Writer agent."""
+        self.prompt_token_budget = prompt_token_budget
+        self.section_prompt_token_budget = section_prompt_token_budget
         self.agent = create_agent(
             name="Professional Blog Writer",
             instructions="""You are a professional blog writer specialized in creating engaging and informative content. 
@@ -11,40 +83,51 @@ class Writer:
             Focus on creating content that is both informative and enjoyable to read, with clear structure and smooth flow."""
         )
     
-    def run(self, outline: str, research: str, keywords: str , trend_summary: str , 
+    def build_prompt(self, outline: str, research: str, keywords: str , trend_summary: str , 
             tone: str , language: str , word_count: int ,intent: str , title: str ,
             blog_length: str = "medium", include_keywords: str = "", avoid_keywords: str = "",
             generated_title: str = "") -> str:
-        if not self.agent:
-            return "[OpenAI API key missing]"
-            
+        """Build the blog writing prompt, placing each large input exactly once."""
         # Use provided keywords or fallback to include_keywords
         final_keywords = keywords if keywords else include_keywords
         
         # Use provided title or generated_title
         blog_title = title if title else generated_title
-            
-        prompt = f"""
-You are an expert AI blog writer. Write a blog using all keywords from {final_keywords} and incorporate trends from {trend_summary}. Follow the outline in {outline} *exactly* — do not skip, rename, merge, or reorder any H2 or H3 headings.
 
-Blog Outline:
-{outline}
+        builder = PromptBuilder(self.prompt_token_budget)
+        builder.add_section("OUTLINE", outline, trim=False)
+        builder.add_section("KEYWORDS", final_keywords, trim=False)
+        builder.add_section("AVOID KEYWORDS", avoid_keywords, trim=False)
+        builder.add_section("RESEARCH", research)
+        builder.add_section("TREND SUMMARY", trend_summary)
 
-Research Information:
-{research}
+        keyword_rule = "  - Seamlessly integrate every keyword from KEYWORDS into the prose naturally.\n" if builder.has("KEYWORDS") else ""
+        avoid_rule = "- Do not use any term from AVOID KEYWORDS.\n" if builder.has("AVOID KEYWORDS") else ""
+        intro_title = f" using the title \"{blog_title}\"" if blog_title else ""
+        guidelines = ["Follow the outline structure exactly - do not add, remove, or modify headings"]
+        if builder.has("RESEARCH"):
+            guidelines.append("Incorporate findings from RESEARCH naturally throughout the content")
+        if builder.has("TREND SUMMARY"):
+            guidelines.append("Use TREND SUMMARY to make the content current and relevant")
+        guidelines += [
+            "Ensure all keywords are integrated seamlessly into the text",
+            "Maintain the specified tone and language throughout",
+            "Do not add content beyond what's outlined",
+            "Create clear, SEO-optimized, plagiarism-free content",
+        ]
+        guideline_list = "\n".join(f"{i}. {rule}" for i, rule in enumerate(guidelines, 1))
 
-Trend Summary:
-{trend_summary}
+        instructions = f"""
+Write the blog from the inputs above. Follow OUTLINE *exactly* — do not skip, rename, merge, or reorder any H2 or H3 headings.
 
 Use H2 (`##`) for main titles and H3 (`###`) for subtopics. Maintain a consistent {tone} tone, write in {language}, and strictly match the {word_count} words (±5 words). Optimize for SEO.
 
 Structure:
-- Begin with "## Introduction": one paragraph introducing the blog using {blog_title}. Do not insert a title here.
+- Begin with "## Introduction": one paragraph introducing the blog{intro_title}. Do not insert a title here.
 - For body content:
-  - Use H2 for each main section from the outline.
-  - Use H3 for each subsection from the outline.
-  - Seamlessly integrate all keywords: {final_keywords} into the prose naturally.
-  - Use bullet points or numbered lists strictly when:
+  - Use H2 for each main section from OUTLINE.
+  - Use H3 for each subsection from OUTLINE.
+{keyword_rule}  - Use bullet points or numbered lists strictly when:
     - Highlighting features or statistics
     - Detailing step-by-step instructions
     - Enumerating pros/cons or tips
@@ -53,24 +136,214 @@ Structure:
 
 Parameters:
 - Blog length: {blog_length}
-- Include keywords: {final_keywords}
-- Avoid keywords: {avoid_keywords}
 - Intent: {intent}
 - Target word count: {word_count} words
-
+{avoid_rule}
 Important Guidelines:
-1. Follow the outline structure exactly - do not add, remove, or modify headings
-2. Incorporate research findings naturally throughout the content
-3. Use trends from trend summary to make content current and relevant
-4. Ensure all keywords are integrated seamlessly into the text
-5. Maintain the specified tone and language throughout
-6. Do not add content beyond what's outlined
-7. Create clear, SEO-optimized, plagiarism-free content
+{guideline_list}
 
 Write the complete blog post now:
 """
+        return builder.build(instructions, preamble="You are an expert AI blog writer.")
+
+    async def run_async(self, outline: str, research: str, keywords: str , trend_summary: str , 
+            tone: str , language: str , word_count: int ,intent: str , title: str ,
+            blog_length: str = "medium", include_keywords: str = "", avoid_keywords: str = "",
+            generated_title: str = "") -> str:
+        if not self.agent:
+            return "[OpenAI API key missing]"
+
+        prompt = self.build_prompt(
+            outline, research, keywords, trend_summary, tone, language, word_count, intent, title,
+            blog_length=blog_length, include_keywords=include_keywords,
+            avoid_keywords=avoid_keywords, generated_title=generated_title
+        )
         
+        return await call_openai_agent(self.agent, prompt)
+
+    def run(self, outline: str, research: str, keywords: str , trend_summary: str , 
+            tone: str , language: str , word_count: int ,intent: str , title: str ,
+            blog_length: str = "medium", include_keywords: str = "", avoid_keywords: str = "",
+            generated_title: str = "") -> str:
+        """Synchronous wrapper for :meth:`run_async`."""
+        return run_sync(self.run_async(
+            outline, research, keywords, trend_summary,
+            tone, language, word_count, intent, title,
+            blog_length=blog_length, include_keywords=include_keywords,
+            avoid_keywords=avoid_keywords, generated_title=generated_title
+        ))
+
+    async def stream_async(self, outline: str, research: str, keywords: str , trend_summary: str , 
+            tone: str , language: str , word_count: int ,intent: str , title: str ,
+            blog_length: str = "medium", include_keywords: str = "", avoid_keywords: str = "",
+            generated_title: str = "", stall_timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Yield the blog draft in chunks as the model generates it."""
+        prompt = self.build_prompt(
+            outline, research, keywords, trend_summary, tone, language, word_count, intent, title,
+            blog_length=blog_length, include_keywords=include_keywords,
+            avoid_keywords=avoid_keywords, generated_title=generated_title
+        )
+        async for chunk in stream_openai_agent(self.agent, prompt, stall_timeout=stall_timeout):
+            yield chunk
+
+    def build_section_prompt(self, part: Dict[str, Any], headings: List[str], part_word_count: int,
+            research: str, keywords: str, trend_summary: str, tone: str, language: str,
+            intent: str, blog_title: str, avoid_keywords: str = "") -> str:
+        """Build the prompt for one part of the blog in section mode."""
+        builder = PromptBuilder(self.section_prompt_token_budget)
+        builder.add_section("BLOG OUTLINE", "\n".join(f"- {heading}" for heading in headings), trim=False)
+        builder.add_section("THIS SECTION", part["content"], trim=False)
+        builder.add_section("KEYWORDS", keywords, trim=False)
+        builder.add_section("AVOID KEYWORDS", avoid_keywords, trim=False)
+        builder.add_section("RESEARCH", research)
+        builder.add_section("TREND SUMMARY", trend_summary)
+
+        heading = part["heading"]
+        if part["kind"] == "introduction":
+            intro_title = f" titled \"{blog_title}\"" if blog_title else ""
+            task = f"Write the introduction of the blog{intro_title}: one paragraph that sets up the sections in BLOG OUTLINE."
+        elif part["kind"] == "conclusion":
+            task = "Write the conclusion: one paragraph summarizing the sections in BLOG OUTLINE. Avoid generic opening phrases."
+        elif part["kind"] == "faq":
+            task = "Write the FAQ section from THIS SECTION: each question as an H3 (`###`) followed by its answer."
+        elif part["kind"] == "product":
+            task = "Write the product section from THIS SECTION, keeping its price range, link and image exactly as given."
+        else:
+            task = ("Write this body section from THIS SECTION. Use H3 (`###`) for each subtopic, in order, without renaming them. "
+                    "Use bullet points or numbered lists only for features, statistics, steps, pros/cons or tips; "
+                    "otherwise write two well-organized paragraphs per subtopic. If THIS SECTION has an "
+                    "enhanced_subtopic, include its table and quotes under the matching subtopic.")
+
+        rules = [f"Begin with the heading \"## {heading}\" and write only this part; the other parts of BLOG OUTLINE are written separately, so do not repeat their content"]
+        if builder.has("KEYWORDS"):
+            rules.append("Integrate the keywords from KEYWORDS that fit this part naturally")
+        if builder.has("AVOID KEYWORDS"):
+            rules.append("Do not use any term from AVOID KEYWORDS")
+        if builder.has("RESEARCH"):
+            rules.append("Draw on RESEARCH for facts and statistics")
+        if builder.has("TREND SUMMARY"):
+            rules.append("Use TREND SUMMARY to keep the content current")
+        rules.append("Create clear, SEO-optimized, plagiarism-free content")
+        rule_list = "\n".join(f"{i}. {rule}" for i, rule in enumerate(rules, 1))
+
+        instructions = f"""
+{task}
+
+Write about {part_word_count} words in {language} with a consistent {tone} tone. Intent: {intent}.
+
+Rules:
+{rule_list}
+
+Write the part now:
+"""
+        return builder.build(instructions, preamble="You are an expert AI blog writer writing one part of a blog post.")
+
+    def _section_tasks(self, outline: str, research: str, keywords: str, trend_summary: str,
+            tone: str, language: str, word_count: int, intent: str, title: str,
+            include_keywords: str = "", avoid_keywords: str = "", generated_title: str = "",
+            stall_timeout: Optional[float] = None) -> List[asyncio.Task]:
+        """
+        Start one agent call per outline part; the tasks are in blog order.
+        With a ``stall_timeout`` each part is streamed, so a part whose model
+        stops sending output fails instead of hanging.
+        """
+        parts = outline_parts(outline)
+        budgets = share_word_count(parts, word_count)
+        headings = [part["heading"] for part in parts]
+        final_keywords = keywords if keywords else include_keywords
+        blog_title = title if title else generated_title
+
+        async def write_part(part: Dict[str, Any], part_word_count: int) -> str:
+            prompt = self.build_section_prompt(
+                part, headings, part_word_count, research, final_keywords, trend_summary,
+                tone, language, intent, blog_title, avoid_keywords=avoid_keywords
+            )
+            if stall_timeout is None:
+                text = await call_openai_agent(self.agent, prompt)
+            else:
+                text = "".join([chunk async for chunk in stream_openai_agent(self.agent, prompt, stall_timeout=stall_timeout)])
+            if is_error_output(text):
+                raise RuntimeError(f"section '{part['heading']}' failed: {text}")
+            return text.strip()
+
+        return [asyncio.create_task(write_part(part, budget)) for part, budget in zip(parts, budgets)]
+
+    async def write_sections_async(self, outline: str, research: str, keywords: str , trend_summary: str , 
+            tone: str , language: str , word_count: int ,intent: str , title: str ,
+            blog_length: str = "medium", include_keywords: str = "", avoid_keywords: str = "",
+            generated_title: str = "") -> str:
+        """
+        Write the introduction, each outline section and the conclusion as
+        concurrent calls and join them in outline order.
+
+        Falls back to a single call for the whole post when the outline
+        cannot be split or a part fails.
+        """
+        if not self.agent:
+            return "[OpenAI API key missing]"
+
+        tasks = []
         try:
-            return call_openai_sync(self.agent, prompt)
+            tasks = self._section_tasks(
+                outline, research, keywords, trend_summary, tone, language, word_count, intent, title,
+                include_keywords=include_keywords, avoid_keywords=avoid_keywords, generated_title=generated_title
+            )
+            print(f"✍️ Writing {len(tasks)} blog parts concurrently")
+            return "\n\n".join(await asyncio.gather(*tasks))
         except Exception as e:
-            return f"[Error in Writer agent: {str(e)}]"
+            for task in tasks:
+                task.cancel()
+            print(f"⚠️ Section mode failed ({e}); writing the blog in one call")
+            return await self.run_async(
+                outline, research, keywords, trend_summary, tone, language, word_count, intent, title,
+                blog_length=blog_length, include_keywords=include_keywords,
+                avoid_keywords=avoid_keywords, generated_title=generated_title
+            )
+
+    async def stream_sections_async(self, outline: str, research: str, keywords: str , trend_summary: str , 
+            tone: str , language: str , word_count: int ,intent: str , title: str ,
+            blog_length: str = "medium", include_keywords: str = "", avoid_keywords: str = "",
+            generated_title: str = "", stall_timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Write the parts concurrently and yield each one, in outline order, as
+        soon as it is ready.
+
+        Like :meth:`write_sections_async`, falls back to streaming the whole
+        post in one call when the outline cannot be split or the first part
+        fails; once a part has been yielded, a failing part raises.
+        """
+        if not self.agent:
+            yield "[OpenAI API key missing]"
+            return
+
+        tasks = []
+        try:
+            first = None
+            try:
+                tasks = self._section_tasks(
+                    outline, research, keywords, trend_summary, tone, language, word_count, intent, title,
+                    include_keywords=include_keywords, avoid_keywords=avoid_keywords,
+                    generated_title=generated_title, stall_timeout=stall_timeout
+                )
+                print(f"✍️ Writing {len(tasks)} blog parts concurrently")
+                first = await tasks[0]
+            except Exception as e:
+                print(f"⚠️ Section mode failed ({e}); streaming the blog in one call")
+
+            if first is None:
+                for task in tasks:
+                    task.cancel()
+                async for chunk in self.stream_async(
+                    outline, research, keywords, trend_summary, tone, language, word_count, intent, title,
+                    blog_length=blog_length, include_keywords=include_keywords,
+                    avoid_keywords=avoid_keywords, generated_title=generated_title, stall_timeout=stall_timeout
+                ):
+                    yield chunk
+                return
+
+            yield first
+            for task in tasks[1:]:
+                yield "\n\n" + await task
+        finally:
+            for task in tasks:
+                task.cancel()
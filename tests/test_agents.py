@@ -0,0 +1,22 @@
+import json
+
+import pytest
+
+from flow.agents import _prepare_outline
+from flow.checkpoint import StageOutputError
+
+
+def test_prepare_outline_fails_on_agent_error():
+    with pytest.raises(StageOutputError):
+        _prepare_outline("[Error in OutlineCreator agent: timeout]", faq=False, has_product=False)
+
+
+def test_prepare_outline_fails_on_unparseable_outline():
+    with pytest.raises(StageOutputError):
+        _prepare_outline("Sorry, I cannot help with that.", faq=False, has_product=False)
+
+
+def test_prepare_outline_drops_unrequested_entries():
+    outline = json.dumps([{"title": "Intro"}, {"faq": "Why?"}, {"product_title": "Shoes"}])
+
+    assert json.loads(_prepare_outline(outline, faq=False, has_product=False)) == [{"title": "Intro"}]
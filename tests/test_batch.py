@@ -0,0 +1,92 @@
+import asyncio
+import csv
+
+import pytest
+
+from flow import batch
+from flow.agents import blog_output_path
+from flow.batch import load_blog_configs
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+def test_csv_fields_are_coerced(tmp_path):
+    path = write_csv(tmp_path / "blogs.csv", [{
+        "topic": "trail running",
+        "word_count": "1500",
+        "faq": "false",
+        "llm_cache": "no",
+        "llm_cache_bypass": "draft, final_blog",
+        "stream": "false",
+        "stream_stall_timeout": "90",
+        "token_budget": "5000",
+        "llm_seo": "0",
+        "fit_word_count": "False",
+        "word_count_rounds": "2",
+        "word_count_tolerance": "0.1",
+        "checkpoint": "no",
+    }])
+
+    config = load_blog_configs(path)[0]
+
+    assert config["topic"] == "trail running"
+    assert config["word_count"] == 1500
+    assert config["faq"] is False
+    assert config["llm_cache"] is False
+    assert config["llm_cache_bypass"] == ["draft", "final_blog"]
+    assert config["stream"] is False
+    assert config["stream_stall_timeout"] == 90.0
+    assert config["token_budget"] == 5000
+    assert config["llm_seo"] is False
+    assert config["fit_word_count"] is False
+    assert config["word_count_rounds"] == 2
+    assert config["word_count_tolerance"] == 0.1
+    assert config["checkpoint"] is False
+
+
+def test_empty_csv_cells_use_defaults(tmp_path):
+    path = write_csv(tmp_path / "blogs.csv", [{"topic": "remote work", "word_count": ""}])
+
+    config = load_blog_configs(path, defaults={"word_count": 2000})[0]
+
+    assert config["word_count"] == 2000
+
+
+def test_jsonl_errors_name_the_line(tmp_path):
+    path = tmp_path / "blogs.jsonl"
+    path.write_text('{"topic": "a"}\n\n{"topic": "b", "word_count": "many"}\n', encoding="utf-8")
+
+    with pytest.raises(ValueError, match=r"blogs.jsonl:3: invalid value for 'word_count'"):
+        load_blog_configs(str(path))
+
+
+def test_jsonl_lines_must_be_objects(tmp_path):
+    path = tmp_path / "blogs.jsonl"
+    path.write_text('["remote work"]\n', encoding="utf-8")
+
+    with pytest.raises(ValueError, match=r"blogs.jsonl:1: expected a JSON object"):
+        load_blog_configs(str(path))
+
+
+def test_batch_items_with_the_same_topic_get_their_own_files(tmp_path, monkeypatch):
+    paths = []
+
+    async def fake_orchestrate(config):
+        paths.append(blog_output_path(config["topic"], config.get("output_suffix", "")))
+        return {"output_file": paths[-1]}
+
+    monkeypatch.setattr(batch, "orchestrate_blog_creation_async", fake_orchestrate)
+    configs = [{"topic": "remote work"}, {"topic": "remote work"}, {"topic": "remote work", "output_suffix": "v2"}]
+
+    asyncio.run(batch.run_batch_async(configs, results_path=str(tmp_path / "results.jsonl")))
+
+    assert sorted(paths) == [
+        "output/blog_remote_work_0.md", "output/blog_remote_work_1.md", "output/blog_remote_work_v2.md",
+    ]
+    assert "output_suffix" not in configs[0]
@@ -0,0 +1,24 @@
+import os
+
+from tools.cache import PersistentCache
+
+
+def test_cache_opens_its_file_on_first_use(tmp_path):
+    path = tmp_path / "nested" / "cache.sqlite"
+
+    cache = PersistentCache(str(path))
+    assert not os.path.exists(path.parent)
+
+    assert cache.get("missing") is None
+    assert path.exists()
+
+
+def test_cache_round_trip_and_eviction(tmp_path):
+    cache = PersistentCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+
+    for key in ("a", "b", "c"):
+        cache.set(key, {"value": key})
+
+    assert cache.get("a") is None
+    assert cache.get("c") == {"value": "c"}
+    assert cache.get_stats()["entries"] == 2
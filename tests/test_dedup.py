@@ -0,0 +1,24 @@
+from tools.dedup import canonicalize_url, dedupe_results
+
+SNIPPET = "The AI market grew by 40 percent in 2024 according to a new report from analysts"
+
+
+def test_canonicalize_url_unwraps_google_amp_on_cctld_hosts():
+    assert canonicalize_url("https://www.google.co.uk/amp/s/example.com/story/") == "https://example.com/story"
+    assert canonicalize_url("https://example-com.cdn.ampproject.org/c/s/example.com/story") == "https://example.com/story"
+
+
+def test_dedupe_results_keeps_original_links():
+    results = [
+        {"title": "AI boom", "snippet": SNIPPET, "link": "http://m.site.com/story.amp.html?ref=dev"},
+        {"title": "AI boom", "snippet": SNIPPET + ".", "link": "https://other.com/ai?utm_source=x"},
+        {"title": "Same page", "snippet": "Short", "link": "https://site.com/story.html"},
+    ]
+
+    deduped = dedupe_results(results)
+
+    assert len(deduped) == 1
+    assert deduped[0]["link"] == "http://m.site.com/story.amp.html?ref=dev"
+    assert deduped[0]["also_at"] == ["https://other.com/ai?utm_source=x"]
+    assert deduped[0]["snippet"] == SNIPPET + "."
+    assert "also_at" not in results[0]
@@ -0,0 +1,50 @@
+import pytest
+
+from tools import rate_limit as module
+from tools.rate_limit import RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(module.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def limiter(tmp_path):
+    # 60/min is one per second; a 5 second burst holds 5
+    return RateLimiter(str(tmp_path / "limits.sqlite3"), burst_seconds=5)
+
+
+def test_reserve_is_free_within_the_burst(limiter, clock):
+    assert [limiter.reserve("serper:requests", 1, 60) for _ in range(5)] == [0.0] * 5
+
+
+def test_reserve_waits_off_the_debt(limiter, clock):
+    assert limiter.reserve("serper:requests", 5, 60) == 0.0
+
+    assert limiter.reserve("serper:requests", 1, 60) == pytest.approx(1.0)
+    assert limiter.reserve("serper:requests", 3, 60) == pytest.approx(4.0)
+
+
+def test_reserve_refills_over_time_up_to_capacity(limiter, clock):
+    limiter.reserve("serper:requests", 7, 60)
+    clock[0] += 4
+    assert limiter.reserve("serper:requests", 1, 60) == pytest.approx(0.0)
+
+    clock[0] += 3600
+    assert limiter.reserve("serper:requests", 6, 60) == pytest.approx(1.0)
+
+
+def test_buckets_are_independent(limiter, clock):
+    limiter.reserve("serper:requests", 10, 60)
+
+    assert limiter.reserve("openai:requests", 1, 60) == 0.0
+
+
+def test_reserve_counts_batch_requests(limiter, clock, monkeypatch):
+    monkeypatch.setattr(module, "_limiter", limiter)
+    monkeypatch.setitem(module.RATE_LIMITS, "serper:requests", 60)
+
+    assert module._reserve("serper", requests=8) == pytest.approx(3.0)
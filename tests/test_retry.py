@@ -0,0 +1,83 @@
+import asyncio
+from email.utils import formatdate
+
+import pytest
+
+from tools import retry as module
+from tools.retry import RetryPolicy, is_retryable, retry_after, retry_delay
+
+
+class Response:
+    def __init__(self, status_code=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code=None, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = Response(status_code, headers)
+
+
+class Code:
+    def __init__(self, name):
+        self.name = name
+
+
+class GrpcError(Exception):
+    def __init__(self, name):
+        super().__init__(name)
+        self._code = Code(name)
+
+    def code(self):
+        return self._code
+
+
+class RateLimitError(Exception):
+    pass
+
+
+@pytest.mark.parametrize("error, expected", [
+    (TimeoutError(), True),
+    (asyncio.TimeoutError(), True),
+    (ConnectionResetError(), True),
+    (HTTPError(429), True),
+    (HTTPError(503), True),
+    (HTTPError(400), False),
+    (HTTPError(401), False),
+    (GrpcError("RESOURCE_EXHAUSTED"), True),
+    (GrpcError("INVALID_ARGUMENT"), False),
+    (RateLimitError(), True),
+    (ValueError("bad prompt"), False),
+])
+def test_is_retryable(error, expected):
+    assert is_retryable(error) is expected
+
+
+def test_retry_after_prefers_milliseconds():
+    error = HTTPError(429, {"retry-after-ms": "1500", "retry-after": "9"})
+
+    assert retry_after(error) == 1.5
+
+
+def test_retry_after_seconds_and_http_date(monkeypatch):
+    monkeypatch.setattr(module.time, "time", lambda: 1_000_000.0)
+
+    assert retry_after(HTTPError(429, {"retry-after": "7"})) == 7.0
+    assert retry_after(HTTPError(429, {"retry-after": formatdate(1_000_030, usegmt=True)})) == pytest.approx(30.0)
+    assert retry_after(HTTPError(429, {"retry-after": formatdate(999_000, usegmt=True)})) == 0.0
+
+
+def test_retry_after_ignores_missing_or_invalid_headers():
+    assert retry_after(ValueError()) is None
+    assert retry_after(HTTPError(429)) is None
+    assert retry_after(HTTPError(429, {"retry-after": "soon"})) is None
+
+
+def test_retry_delay_honours_retry_after_and_the_attempt_limit():
+    policy = RetryPolicy(max_attempts=3, max_delay=10)
+    error = HTTPError(429, {"retry-after": "4"})
+
+    assert retry_delay(policy, error, 1, started=module.time.monotonic(), name="test") == 4.0
+    assert retry_delay(policy, error, 3, started=module.time.monotonic(), name="test") is None
+    assert retry_delay(policy, HTTPError(400), 1, started=module.time.monotonic(), name="test") is None
@@ -0,0 +1,60 @@
+import pytest
+
+from openai_agents.usage import TokenBudgetExceeded, UsageLedger
+
+
+class Usage:
+    requests = 1
+    input_tokens = 80
+    output_tokens = 40
+    total_tokens = 120
+
+
+def spent_ledger(policy="degrade"):
+    ledger = UsageLedger(budget=100, policy=policy)
+    ledger.record("Writer", Usage())
+    return ledger
+
+
+def test_required_stage_raises_without_being_degraded():
+    ledger = spent_ledger()
+
+    with pytest.raises(TokenBudgetExceeded):
+        ledger.check("outline", can_degrade=False)
+
+    assert ledger.to_dict()["degraded_stages"] == []
+
+
+def test_degraded_stage_is_recorded_once_it_degrades():
+    ledger = spent_ledger()
+
+    assert ledger.check("final_blog") is False
+    assert ledger.to_dict()["degraded_stages"] == []
+
+    ledger.mark_degraded("final_blog")
+    assert ledger.to_dict()["degraded_stages"] == ["final_blog"]
+
+
+def test_abort_policy_raises_for_every_stage():
+    ledger = spent_ledger(policy="abort")
+
+    with pytest.raises(TokenBudgetExceeded):
+        ledger.check("final_blog")
+
+
+def test_reserve_shares_the_budget_between_concurrent_calls():
+    ledger = UsageLedger(budget=1000)
+
+    assert ledger.reserve(input_tokens=100, max_output_tokens=5000, min_output_tokens=100) == 900
+    with pytest.raises(TokenBudgetExceeded):
+        ledger.reserve(input_tokens=100, max_output_tokens=5000, min_output_tokens=100)
+
+    ledger.release(1000)
+    assert ledger.reserve(input_tokens=100, max_output_tokens=300, min_output_tokens=100) == 300
+
+
+def test_reserve_refuses_calls_below_the_output_floor():
+    ledger = spent_ledger()
+
+    with pytest.raises(TokenBudgetExceeded):
+        ledger.reserve(input_tokens=0, max_output_tokens=5000, min_output_tokens=1)
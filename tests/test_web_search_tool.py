@@ -0,0 +1,60 @@
+from tools.tokens import count_tokens
+from tools.web_search_tool import MIN_SNIPPET_TOKENS, web_search_tool
+
+
+def make_result(index, title_words, snippet_words):
+    return {
+        "title": " ".join(["headline"] * title_words) + f" {index}",
+        "snippet": " ".join(["detail"] * snippet_words),
+        "link": f"https://example.com/{index}",
+        "date": "",
+    }
+
+
+def test_format_search_results_fills_token_budget():
+    # The top-ranked result is too long to fit even with its snippet cut;
+    # the shorter results after it should fill the budget instead
+    results = [make_result(0, 80, 40)] + [make_result(i, 2, 40) for i in range(1, 6)]
+    budget = 160
+
+    formatted = web_search_tool.format_search_results(results, token_budget=budget)
+
+    tokens = count_tokens(formatted)
+    assert tokens <= budget
+    assert tokens >= budget - MIN_SNIPPET_TOKENS
+    assert "https://example.com/0" not in formatted
+    assert "https://example.com/1" in formatted
+    assert "https://example.com/2" in formatted
+
+
+def test_format_search_results_without_budget_keeps_everything():
+    results = [make_result(i, 2, 40) for i in range(5)]
+
+    formatted = web_search_tool.format_search_results(results)
+
+    assert all(f"https://example.com/{i}" in formatted for i in range(5))
+
+
+def test_batch_post_reserves_one_request_per_query(monkeypatch):
+    from tools import web_search_tool as module
+
+    reserved = []
+
+    class Response:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return [{}, {}, {}]
+
+    class Session:
+        def post(self, *args, **kwargs):
+            return Response()
+
+    monkeypatch.setattr(module, "rate_limit", lambda provider, tokens=0, requests=1: reserved.append(requests))
+    monkeypatch.setattr(web_search_tool, "session", Session())
+
+    web_search_tool._post(module.SERPER_SEARCH_URL, [{"q": "a"}, {"q": "b"}, {"q": "c"}])
+    web_search_tool._post(module.SERPER_SEARCH_URL, {"q": "a"})
+
+    assert reserved == [3, 1]
@@ -0,0 +1,58 @@
+from openai_agents.word_count_editor import section_word_budgets
+from tools.markdown_utils import split_h2_sections, split_lead
+
+BLOG = """# Running Shoes Guide
+
+![cover](https://example.com/cover.png)
+
+## Introduction
+Intro text.
+
+## Choosing a Shoe
+### Fit
+Text.
+### Cushioning
+Text.
+
+## Frequently Asked Questions
+### Do I need two pairs?
+Yes.
+### How often should I replace them?
+Often.
+### Are they waterproof?
+Some.
+### Can I wash them?
+Gently.
+
+## Trail Runner X
+A product.
+
+## Conclusion
+Wrap up.
+"""
+
+
+def test_split_lead_keeps_title_out_of_the_first_section():
+    lead, body = split_lead(BLOG)
+
+    assert lead.startswith("# Running Shoes Guide")
+    assert split_h2_sections(body)[0].startswith("## Introduction")
+
+
+def test_section_word_budgets_use_writer_weights():
+    _, body = split_lead(BLOG)
+    sections = split_h2_sections(body)
+
+    budgets = section_word_budgets(sections, 800)
+
+    # introduction 1, section 1 + 2 subtopics, FAQ 4 // 2, product 1, conclusion 1
+    assert budgets == [100, 300, 200, 100, 100]
+
+
+def test_section_word_budgets_hand_the_remainder_to_body_sections():
+    sections = ["## Introduction\nA", "## Body\n### One\nB", "## Conclusion\nC"]
+
+    budgets = section_word_budgets(sections, 101)
+
+    assert sum(budgets) == 101
+    assert budgets == [25, 51, 25]
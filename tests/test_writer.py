@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import pytest
+
+from openai_agents import writer as writer_module
+from openai_agents.writer import Writer
+
+OUTLINE = json.dumps([{"title": "Choosing a Shoe", "subtopics": ["Fit", "Cushioning"]}])
+
+
+@pytest.fixture
+def writer():
+    blog_writer = Writer()
+    blog_writer.agent = object()
+    return blog_writer
+
+
+def collect(chunks):
+    async def run():
+        return [chunk async for chunk in chunks]
+    return asyncio.run(run())
+
+
+def stream_args(**overrides):
+    args = dict(outline=OUTLINE, research="", keywords="", trend_summary="", tone="friendly",
+                language="English", word_count=300, intent="informational", title="Shoes")
+    args.update(overrides)
+    return args
+
+
+def test_stream_sections_streams_parts_with_the_stall_timeout(writer, monkeypatch):
+    timeouts = []
+
+    async def fake_stream(agent, prompt, stall_timeout=None):
+        timeouts.append(stall_timeout)
+        yield "## Part"
+
+    monkeypatch.setattr(writer_module, "stream_openai_agent", fake_stream)
+
+    chunks = collect(writer.stream_sections_async(**stream_args(), stall_timeout=5))
+
+    assert chunks == ["## Part", "\n\n## Part", "\n\n## Part"]
+    assert timeouts == [5, 5, 5]
+
+
+def test_stream_sections_falls_back_to_one_stream_for_a_bad_outline(writer, monkeypatch):
+    async def fake_stream(agent, prompt, stall_timeout=None):
+        yield "whole blog"
+
+    monkeypatch.setattr(writer_module, "stream_openai_agent", fake_stream)
+
+    chunks = collect(writer.stream_sections_async(**stream_args(outline="not json"), stall_timeout=5))
+
+    assert chunks == ["whole blog"]
+
+
+def test_stream_sections_falls_back_when_the_first_part_fails(writer, monkeypatch):
+    async def failing_call(agent, prompt):
+        return "[Error in Writer agent: timeout]"
+
+    async def fake_stream(agent, prompt, stall_timeout=None):
+        yield "whole blog"
+
+    monkeypatch.setattr(writer_module, "call_openai_agent", failing_call)
+    monkeypatch.setattr(writer_module, "stream_openai_agent", fake_stream)
+
+    chunks = collect(writer.stream_sections_async(**stream_args()))
+
+    assert chunks == ["whole blog"]
@@ -1,15 +1,35 @@
 """
 Tools package for OpenAI Agent SDK
 Contains various utility tools for agents
+
+The exported tools are imported on first access, so that importing a light
+submodule (e.g. ``tools.tokens``) does not load requests or the Google Ads SDK.
 """
 
-from .web_search_tool import WebSearchTool
-from .keyword_research_tool import GoogleKeywordIdeaGeneratorTool, keyword_tool
-from .google import GoogleKeywordIdeaGenerator
+import importlib
+
+_EXPORTS = {
+    'WebSearchTool': '.web_search_tool',
+    'GoogleKeywordIdeaGeneratorTool': '.keyword_research_tool',
+    'keyword_tool': '.keyword_research_tool',
+    'GoogleKeywordIdeaGenerator': '.google',
+}
 
 __all__ = [
     'WebSearchTool',
-    'GoogleKeywordIdeaGeneratorTool', 
+    'GoogleKeywordIdeaGeneratorTool',
     'keyword_tool',
     'GoogleKeywordIdeaGenerator'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,147 @@
+"""
+Persistent Cache - small SQLite-backed key/value store with TTL expiry
+and size-bounded LRU eviction, shared by the tools that call paid APIs.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class PersistentCache:
+    """
+    On-disk JSON value cache.
+
+    Entries are stored in a single SQLite file, so the cache survives process
+    restarts and can be shared by several processes on the same machine.
+    Expiry is decided at read time from the entry's age, and the least
+    recently used entries are evicted once the entry or byte limit is exceeded.
+    """
+
+    def __init__(self, path: str, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            path (str): SQLite file to store the cache in (created if missing)
+            max_entries (int): Maximum number of entries kept (default: unbounded)
+            max_bytes (int): Maximum total size of stored values (default: unbounded)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        # Opened on first use, so creating a cache (e.g. at import time) never touches the disk
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the SQLite file and create the table on first use; call with the lock held."""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a stable cache key from JSON-serializable parts."""
+        raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[Any]:
+        """
+        Return the cached value for ``key``, or None on a miss.
+
+        Args:
+            key (str): Cache key, e.g. from :meth:`make_key`
+            ttl (float): Maximum entry age in seconds (default: never expires)
+        """
+        now = time.time()
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (ttl is not None and now - row[1] > ttl):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        """Store a JSON-serializable value and evict old entries if over the limits."""
+        data = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data.encode("utf-8")), now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is within its limits."""
+        if self.max_entries is not None:
+            self._conn.execute(
+                """
+                DELETE FROM cache WHERE key IN (
+                    SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+        if self.max_bytes is not None:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            if total > self.max_bytes:
+                rows = self._conn.execute("SELECT key, size FROM cache ORDER BY accessed_at ASC").fetchall()
+                stale_keys = []
+                for key, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    stale_keys.append((key,))
+                    total -= size
+                self._conn.executemany("DELETE FROM cache WHERE key = ?", stale_keys)
+
+    def delete(self, key: str):
+        """Remove a single entry."""
+        with self._lock:
+            self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._connect().execute("DELETE FROM cache")
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict: Hit/miss counters for this process plus entry count and size on disk
+        """
+        with self._lock:
+            entries, size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': entries,
+            'bytes': size,
+        }
@@ -0,0 +1,170 @@
+"""
+De-duplication of search results before they are formatted into prompts.
+
+Results are first grouped by canonical URL (tracking parameters, fragments,
+``www.`` and AMP variants removed), then near-duplicate snippets, such as
+syndicated copies of one article, are merged using MinHash estimates of the
+Jaccard similarity of their word shingles. The links of dropped duplicates
+are kept on the surviving result, so no source is lost.
+"""
+
+import hashlib
+import re
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track the visit and never change the page
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "ref", "ref_src", "ref_url", "cmpid", "spm", "ocid", "sr_share",
+    "amp", "outputtype",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "hsa_", "vero_")
+
+SHINGLE_SIZE = 3
+MINHASH_PERMUTATIONS = 64
+NEAR_DUPLICATE_THRESHOLD = 0.7
+
+_MERSENNE_PRIME = (1 << 61) - 1
+# Fixed (a, b) pairs so signatures are comparable across runs
+_PERMUTATIONS = [
+    (
+        int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE_PRIME | 1,
+        int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE_PRIME,
+    )
+    for i in range(MINHASH_PERMUTATIONS)
+]
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL so that copies of the same page compare equal.
+
+    Lower-cases the scheme and host, drops ``www.``, ``m.`` and ``amp.``
+    host prefixes, unwraps Google AMP cache links, removes trailing ``/amp``
+    and ``.amp`` path variants, tracking parameters, default ports,
+    fragments and trailing slashes, and sorts the remaining query parameters.
+    Only meant as a grouping key: the result may not be a URL that resolves.
+
+    Args:
+        url (str): Any URL
+
+    Returns:
+        str: Canonical form of ``url`` ("" for an empty URL)
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    if "://" not in url:
+        url = "https://" + url
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    path = parts.path
+
+    # https://www.google.com/amp/s/example.com/page (or any Google ccTLD) and
+    # https://example-com.cdn.ampproject.org/c/s/example.com/page
+    amp_cache = re.match(r"^/(?:amp|c)/(?:s/)?([^/]+)(/.*)?$", path)
+    on_google = re.match(r"^(?:www\.)?google(?:\.com?)?(?:\.[a-z]{2})?$", host) is not None
+    if amp_cache and (host.endswith("ampproject.org") or (on_google and path.startswith("/amp/"))):
+        host, path = amp_cache.group(1).lower(), amp_cache.group(2) or "/"
+
+    host = re.sub(r"^(?:www\d*|m|amp|mobile)\.", "", host)
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r"/amp(?:\.html)?/?$", "/", path)
+    path = re.sub(r"\.amp(\.html?)?$", r"\1", path)
+    path = re.sub(r"/{2,}", "/", path).rstrip("/")
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+
+def _shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    words = re.findall(r"\w+", (text or "").lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash_signature(text: str) -> Optional[List[int]]:
+    """
+    MinHash signature of the word shingles of ``text`` (None for empty text).
+    The share of equal positions in two signatures estimates the Jaccard
+    similarity of the texts' shingle sets.
+    """
+    shingles = _shingles(text)
+    if not shingles:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big") for s in shingles]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def signature_similarity(first: List[int], second: List[int]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+def dedupe_results(results: List[Dict], threshold: float = NEAR_DUPLICATE_THRESHOLD) -> List[Dict]:
+    """
+    Drop duplicate and near-duplicate search results.
+
+    Canonical URLs are only used to group results; every link stays exactly
+    as the search returned it. The first result of each group is kept, with
+    the longer snippet of the group and the other links of the group in
+    ``also_at``. Answer boxes and error entries are kept as is.
+
+    Args:
+        results (List[Dict]): Results in the format of WebSearchTool.search
+        threshold (float): Similarity above which two snippets count as the
+            same content (0-1)
+
+    Returns:
+        List[Dict]: De-duplicated results, in their original order
+    """
+    kept: List[Dict] = []
+    by_url: Dict[str, Dict] = {}
+    signatures: List[tuple] = []
+
+    def merge(target: Dict, duplicate: Dict, key: str):
+        # Other copies of the target's own page add nothing to cite
+        link = duplicate.get("link", "")
+        if link and key != canonicalize_url(target.get("link", "")) and link not in target.setdefault("also_at", []):
+            target["also_at"].append(link)
+        if len(duplicate.get("snippet", "")) > len(target.get("snippet", "")):
+            target["snippet"] = duplicate["snippet"]
+
+    for result in results:
+        if "error" in result or result.get("type") == "answer_box":
+            kept.append(result)
+            continue
+
+        key = canonicalize_url(result.get("link", ""))
+        if key and key in by_url:
+            merge(by_url[key], result, key)
+            continue
+
+        signature = minhash_signature(f"{result.get('title', '')} {result.get('snippet', '')}")
+        match = None
+        if signature is not None:
+            match = next(
+                (target for target, other in signatures if signature_similarity(signature, other) >= threshold),
+                None,
+            )
+        if match is not None:
+            merge(match, result, key)
+            if key:
+                by_url[key] = match
+            continue
+
+        # Copied, so merging never changes the (possibly cached) input results
+        result = dict(result)
+        kept.append(result)
+        if key:
+            by_url[key] = result
+        if signature is not None:
+            signatures.append((result, signature))
+    return kept
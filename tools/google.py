@@ -1,10 +1,21 @@
 # from django.conf import settings
+import json
 import os
-from google.ads.googleads.client import GoogleAdsClient
-from google.ads.googleads.v18.services.types.keyword_plan_idea_service import (
-    GenerateKeywordIdeaResponse,
-    GenerateKeywordIdeasRequest,
-)
+import threading
+from typing import TYPE_CHECKING
+
+from .rate_limit import rate_limit
+from .retry import RetryPolicy, call_with_retry
+from .tracing import span
+
+# The Google Ads SDK and its protobuf types take a long time to import, so they
+# are imported when the first client is loaded rather than with this module
+if TYPE_CHECKING:
+    from google.ads.googleads.client import GoogleAdsClient
+    from google.ads.googleads.v18.services.types.keyword_plan_idea_service import (
+        GenerateKeywordIdeaResponse,
+        GenerateKeywordIdeasRequest,
+    )
 
 # from apps.core.choices import CountryChoices
 
@@ -28,6 +39,77 @@ class CountryChoices:
     ]
 
 
+# Retries for quota (RESOURCE_EXHAUSTED) and transient gRPC errors; the deadline covers all attempts
+GOOGLE_ADS_RETRY_POLICY = RetryPolicy(deadline=float(os.getenv('GOOGLE_ADS_CALL_DEADLINE', 120)))
+
+
+class GoogleAdsClientLoadError(RuntimeError):
+    """Raised when a Google Ads client could not be loaded from its YAML file."""
+
+
+class GoogleAdsClientPool:
+    """
+    Process-wide pool of GoogleAdsClient instances and service stubs, keyed by
+    YAML path. Loading a client parses the YAML, builds credentials and opens
+    gRPC channels, so it is done once and shared by every keyword lookup.
+    A failed load is remembered and re-raised immediately on later requests.
+    """
+
+    def __init__(self, version: str = "v18"):
+        self.version = version
+        self._clients = {}
+        self._services = {}
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    def get_client(self, yaml_path: str) -> "GoogleAdsClient":
+        """Return the shared client for ``yaml_path``, loading it on first use."""
+        key = os.path.abspath(yaml_path)
+        with self._lock:
+            if key in self._failures:
+                raise GoogleAdsClientLoadError(self._failures[key])
+            client = self._clients.get(key)
+            if client is None:
+                try:
+                    from google.ads.googleads.client import GoogleAdsClient
+
+                    client = GoogleAdsClient.load_from_storage(yaml_path, version=self.version)
+                except Exception as e:
+                    self._failures[key] = f"Failed to load Google Ads client from {yaml_path}: {e}"
+                    raise GoogleAdsClientLoadError(self._failures[key]) from e
+                self._clients[key] = client
+            return client
+
+    def get_service(self, yaml_path: str, name: str):
+        """Return the shared service stub ``name`` for the client at ``yaml_path``."""
+        client = self.get_client(yaml_path)
+        key = (os.path.abspath(yaml_path), name)
+        with self._lock:
+            service = self._services.get(key)
+            if service is None:
+                service = client.get_service(name)
+                self._services[key] = service
+            return service
+
+    def reset(self, yaml_path: str | None = None):
+        """Forget loaded clients and failures, e.g. after fixing a missing YAML file."""
+        with self._lock:
+            if yaml_path is None:
+                self._clients.clear()
+                self._services.clear()
+                self._failures.clear()
+                return
+            key = os.path.abspath(yaml_path)
+            self._clients.pop(key, None)
+            self._failures.pop(key, None)
+            for service_key in [k for k in self._services if k[0] == key]:
+                del self._services[service_key]
+
+
+# Shared pool used by every GoogleKeywordIdeaGenerator
+client_pool = GoogleAdsClientPool()
+
+
 class GoogleKeywordIdeaGenerator:
     def __init__(
         self,
@@ -35,13 +117,13 @@ class GoogleKeywordIdeaGenerator:
         keywords: list[str] | str | None = None,
         url: str | None = None,
     ):
-        # Initialize client
-        self.__client = GoogleAdsClient.load_from_storage(
-            getattr(settings, "GOOGLE_ADS_YAML_FILE"), version="v18"
-        )
+        # Initialize client (shared across generators)
+        self.__yaml_path = getattr(settings, "GOOGLE_ADS_YAML_FILE")
+        self.__client = client_pool.get_client(self.__yaml_path)
         
         self.page_size = 20
         self.next_page_token = None
+        self.keyword_plan_network = "GOOGLE_SEARCH"
         
         # Validate inputs
         if (keywords is None and url is None) or (keywords == "" and url == ""):
@@ -75,26 +157,28 @@ class GoogleKeywordIdeaGenerator:
         self.page_size = number
 
     def set_page_token(self, token: str):
-        self.page_token = token
+        self.next_page_token = token
 
     def set_client_yaml_path(self, path: str):
-        self.__client = GoogleAdsClient.load_from_storage(path, version="v18")
+        self.__client = client_pool.get_client(path)
+        self.__yaml_path = path
 
-    def __configure_request(self):
-        language_rn = self.__client.get_service(
-            "GoogleAdsService"
+    def __configure_request(self, page_size: int | None = None):
+        language_rn = client_pool.get_service(
+            self.__yaml_path, "GoogleAdsService"
         ).language_constant_path(1000)
 
-        keyword_plan_network = (
-            self.__client.enums.KeywordPlanNetworkEnum.GOOGLE_SEARCH  # type: ignore
+        keyword_plan_network = getattr(
+            self.__client.enums.KeywordPlanNetworkEnum, self.keyword_plan_network  # type: ignore
         )
 
-        request: GenerateKeywordIdeasRequest = self.__client.get_type(
+        request: "GenerateKeywordIdeasRequest" = self.__client.get_type(
             "GenerateKeywordIdeasRequest"
         )  # type: ignore
         request.language = language_rn
-        request.page_size = self.page_size
-        request.page_token = getattr(self, "next_page_token", None)  # type: ignore
+        request.page_size = page_size or self.page_size
+        if self.next_page_token:
+            request.page_token = self.next_page_token
         if self.location_id:
             request.geo_target_constants.append(
                 f"geoTargetConstants/{self.location_id}"
@@ -113,15 +197,27 @@ class GoogleKeywordIdeaGenerator:
             request.keyword_and_url_seed.keywords.extend(self.keywords)
         return request
 
-    def __generate_keyword_ideas(self):
-        keyword_plan_idea_service = self.__client.get_service("KeywordPlanIdeaService")
-        request = self.__configure_request()
-        keyword_ideas: GenerateKeywordIdeaResponse = (
-            keyword_plan_idea_service.generate_keyword_ideas(request=request)
-        )
-        response = keyword_ideas.results
-        next_page_token = getattr(keyword_ideas, "next_page_token", None)
-        return response, next_page_token
+    def __generate_keyword_ideas(self, page_size: int | None = None):
+        with span("google_ads.generate_keyword_ideas", kind="grpc",
+                  location_id=self.location_id, paged=bool(self.next_page_token)) as ads_span:
+            ads_span.record_input(json.dumps({"keywords": self.keywords, "url": self.url}))
+            keyword_plan_idea_service = client_pool.get_service(
+                self.__yaml_path, "KeywordPlanIdeaService"
+            )
+            request = self.__configure_request(page_size)
+
+            def send() -> "GenerateKeywordIdeaResponse":
+                rate_limit("google_ads")
+                return keyword_plan_idea_service.generate_keyword_ideas(request=request)
+
+            keyword_ideas: "GenerateKeywordIdeaResponse" = call_with_retry(
+                send, policy=GOOGLE_ADS_RETRY_POLICY, name="google_ads.generate_keyword_ideas",
+            )
+            response = keyword_ideas.results
+            next_page_token = getattr(keyword_ideas, "next_page_token", None)
+            ads_span.record_output("\n".join(item.text for item in response))
+            ads_span.set(results=len(response))
+            return response, next_page_token
 
     def get_results(self):
         self.response, self.next_page_token = self.__generate_keyword_ideas()
@@ -130,6 +226,30 @@ class GoogleKeywordIdeaGenerator:
             self.results.append(self.__get_metric(item))
         return self.results
 
+    def iter_results(self, max_results: int | None = None):
+        """
+        Lazily yield keyword metrics, fetching one page at a time.
+
+        Follows ``next_page_token`` from the current position until the API
+        has no more pages or ``max_results`` ideas have been yielded, so
+        callers can stop early without requesting further pages.
+
+        Args:
+            max_results (int): Optional cap on the total number of ideas
+        """
+        produced = 0
+        while max_results is None or produced < max_results:
+            remaining = None if max_results is None else max_results - produced
+            page_size = min(self.page_size, remaining) if remaining is not None else None
+            response, self.next_page_token = self.__generate_keyword_ideas(page_size)
+            for item in response:
+                if max_results is not None and produced >= max_results:
+                    return
+                produced += 1
+                yield self.__get_metric(item)
+            if not self.next_page_token:
+                return
+
     def __get_metric(self, item):
         metrics = item.keyword_idea_metrics
         competition_value = metrics.competition
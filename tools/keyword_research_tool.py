@@ -4,10 +4,18 @@ Specifically designed for the KeywordResearcher agent
 """
 
 import os
-from typing import List, Dict, Optional
+from typing import Dict, Iterator, List, Optional
 
 # Import the Google Keyword Idea Generator
 from .google import GoogleKeywordIdeaGenerator
+from .cache import PersistentCache
+from .tracing import Span, span
+
+# Keyword ideas barely change day to day, so they are cached for days
+KEYWORD_CACHE_PATH = os.getenv('KEYWORD_CACHE_PATH', os.path.join('.cache', 'keyword_ideas.sqlite3'))
+KEYWORD_CACHE_TTL_DAYS = float(os.getenv('KEYWORD_CACHE_TTL_DAYS', 7))
+KEYWORD_CACHE_MAX_ENTRIES = int(os.getenv('KEYWORD_CACHE_MAX_ENTRIES', 2000))
+KEYWORD_CACHE_ENABLED = os.getenv('KEYWORD_CACHE_DISABLED', '').lower() not in ('1', 'true', 'yes')
 
 
 class GoogleKeywordIdeaGeneratorTool:
@@ -16,52 +24,126 @@ class GoogleKeywordIdeaGeneratorTool:
     This tool integrates with the KeywordResearcher agent to provide Google Ads keyword data.
     """
     
-    def __init__(self, location_id: str = "2840", page_size: int = 20):
+    def __init__(self, location_id: str = "2840", page_size: int = 20,
+                 network: str = "GOOGLE_SEARCH", use_cache: bool = KEYWORD_CACHE_ENABLED):
         """
         Initialize the Google Keyword Idea Generator Tool.
         
         Args:
             location_id (str): Geographic location ID (default: 2840 for United States)
             page_size (int): Number of results per page (default: 20)
+            network (str): KeywordPlanNetwork enum name (default: GOOGLE_SEARCH)
+            use_cache (bool): Reuse keyword ideas from the on-disk cache, and
+                fall back to stale entries when the Ads API is unavailable
         """
         self.location_id = location_id
         self.page_size = page_size
-        self.generator = None
+        self.network = network
+        self.cache_ttl = KEYWORD_CACHE_TTL_DAYS * 24 * 3600
+        self.cache = PersistentCache(KEYWORD_CACHE_PATH, max_entries=KEYWORD_CACHE_MAX_ENTRIES) if use_cache else None
+
+    def _cache_key(self, keywords: Optional[List[str]], url: Optional[str], max_results: Optional[int]) -> str:
+        """Key on location, network, result count, URL and the case-folded, sorted seed set."""
+        seeds = sorted({k.strip().casefold() for k in keywords or [] if k.strip()})
+        return PersistentCache.make_key(
+            "keyword-ideas", self.location_id, self.network, max_results or self.page_size,
+            (url or "").strip(), seeds
+        )
+
+    def iter_keyword_ideas(self, keywords: Optional[List[str]] = None, url: Optional[str] = None,
+                           max_results: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Lazily yield keyword ideas from the Google Ads API, one page at a time.
+        
+        Args:
+            keywords (List[str]): List of seed keywords
+            url (str): Optional URL for keyword generation
+            max_results (int): Optional cap on the number of ideas yielded
+            
+        Yields:
+            Dict: Keyword data with metrics
+        """
+        if keywords and isinstance(keywords, str):
+            keywords = [keywords]
+
+        # A local generator: the shared tool instance is used by concurrent blogs
+        generator = GoogleKeywordIdeaGenerator(
+            location_id=self.location_id,
+            keywords=keywords,
+            url=url
+        )
+        generator.set_page_size(self.page_size)
+        generator.keyword_plan_network = self.network
+        yield from generator.iter_results(max_results)
     
-    def generate_keyword_ideas(self, keywords: Optional[List[str]] = None, url: Optional[str] = None) -> List[Dict]:
+    def generate_keyword_ideas(self, keywords: Optional[List[str]] = None, url: Optional[str] = None,
+                               max_results: Optional[int] = None) -> List[Dict]:
         """
         Generate keyword ideas using Google Ads API.
         
         Args:
             keywords (List[str]): List of seed keywords
             url (str): Optional URL for keyword generation
+            max_results (int): Number of ideas to fetch, following pages as
+                needed (default: the first page only)
             
         Returns:
             List[Dict]: List of keyword data with metrics
         """
+        if keywords and isinstance(keywords, str):
+            keywords = [keywords]
+
+        with span("keyword_tool.generate_keyword_ideas", kind="internal",
+                  location_id=self.location_id, seeds=len(keywords or [])) as tool_span:
+            results = self._generate_keyword_ideas(keywords, url, max_results, tool_span)
+            tool_span.set(results=len(results))
+            if len(results) == 1 and "error" in results[0]:
+                tool_span.mark_error(results[0]["error"])
+            return results
+
+    def _generate_keyword_ideas(self, keywords: Optional[List[str]], url: Optional[str],
+                                max_results: Optional[int], tool_span: Span) -> List[Dict]:
+        cache_key = self._cache_key(keywords, url, max_results) if self.cache is not None else None
+        if self.cache is not None:
+            cached = self.cache.get(cache_key, ttl=self.cache_ttl)
+            tool_span.record_cache(cached is not None)
+            if cached is not None:
+                return cached
+
         try:
-            # Initialize the generator with provided parameters
-            if keywords and isinstance(keywords, str):
-                keywords = [keywords]
-            
-            self.generator = GoogleKeywordIdeaGenerator(
-                location_id=self.location_id,
-                keywords=keywords,
-                url=url
-            )
-            
-            # Set page size
-            self.generator.set_page_size(self.page_size)
-            
-            # Get results
-            results = self.generator.get_results()
+            if max_results:
+                results = list(self.iter_keyword_ideas(keywords, url, max_results))
+            else:
+                # Initialize the generator with provided parameters
+                generator = GoogleKeywordIdeaGenerator(
+                    location_id=self.location_id,
+                    keywords=keywords,
+                    url=url
+                )
+                
+                # Set page size
+                generator.set_page_size(self.page_size)
+                generator.keyword_plan_network = self.network
+                
+                # Get results
+                results = generator.get_results()
+            if self.cache is not None and results:
+                self.cache.set(cache_key, results)
             
             return results
             
         except Exception as e:
+            # Rate-limited or unavailable: expired cached ideas beat no ideas
+            if self.cache is not None:
+                stale = self.cache.get(cache_key)
+                if stale is not None:
+                    print(f"⚠️ Keyword API unavailable ({str(e)}), using cached keyword ideas")
+                    tool_span.set(cache="stale")
+                    return stale
             return [{"error": f"Keyword generation failed: {str(e)}"}]
 
-    def search_keywords(self, topic: str, keywords: str, seed_keywords: str = "") -> List[Dict]:
+    def search_keywords(self, topic: str, keywords: str, seed_keywords: str = "",
+                        max_results: Optional[int] = None) -> List[Dict]:
         """
         Search for keywords based on topic and seed keywords.
         Convenience method for the keyword researcher.
@@ -70,6 +152,7 @@ class GoogleKeywordIdeaGeneratorTool:
             topic (str): Main topic for keyword research
             keywords (str): Additional keywords
             seed_keywords (str): Comma-separated seed keywords
+            max_results (int): Number of ideas to fetch (default: the first page)
             
         Returns:
             List[Dict]: List of keyword data
@@ -101,7 +184,7 @@ class GoogleKeywordIdeaGeneratorTool:
                 seen.add(keyword.lower())
                 unique_keywords.append(keyword)
         
-        return self.generate_keyword_ideas(keywords=unique_keywords)
+        return self.generate_keyword_ideas(keywords=unique_keywords, max_results=max_results)
     
     def get_keyword_metrics(self, keywords: List[str]) -> List[Dict]:
         """
@@ -149,7 +232,8 @@ class GoogleKeywordIdeaGeneratorTool:
             str: Formatted keyword list
         """
         try:
-            results = self.search_keywords(topic, "", seed_keywords)
+            # Only as many ideas as the researcher prompt will show
+            results = self.search_keywords(topic, "", seed_keywords, max_results=15)
             return self.format_for_researcher(results)
         except Exception as e:
             print(f"⚠️ Keyword tool search error: {str(e)}")
@@ -0,0 +1,112 @@
+"""
+Helpers for working with the markdown blogs the agents produce.
+"""
+
+import re
+from typing import List, Tuple
+
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_H2 = re.compile(r"^##\s+\S")
+
+
+def split_h2_sections(markdown: str) -> List[str]:
+    """
+    Split markdown into chunks that each start at an H2 heading.
+
+    Text before the first H2 (a title or lead paragraph) stays with the
+    first chunk, and headings inside code fences are not split on.
+
+    Args:
+        markdown (str): Markdown text
+
+    Returns:
+        List[str]: Non-empty chunks in document order; joining them with
+        blank lines gives back the document
+    """
+    chunks: List[List[str]] = [[]]
+    in_fence = False
+    for line in markdown.splitlines():
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        elif not in_fence and _H2.match(line):
+            chunks.append([])
+        chunks[-1].append(line)
+
+    sections = [text for text in ("\n".join(lines).strip() for lines in chunks) if text]
+    if len(sections) > 1 and not _H2.match(sections[0]):
+        # Keep a title or lead paragraph with the first section
+        sections[:2] = [sections[0] + "\n\n" + sections[1]]
+    return sections
+
+
+def split_lead(markdown: str) -> Tuple[str, str]:
+    """
+    Split off the text before the first H2 heading, such as a title or lead
+    paragraph.
+
+    Args:
+        markdown (str): Markdown text
+
+    Returns:
+        Tuple[str, str]: The lead ("" when the text starts with an H2) and
+        the rest of the text from the first H2 on
+    """
+    lines = markdown.splitlines()
+    in_fence = False
+    for index, line in enumerate(lines):
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        elif not in_fence and _H2.match(line):
+            return "\n".join(lines[:index]).strip(), "\n".join(lines[index:]).strip()
+    return markdown.strip(), ""
+
+
+def split_blocks(markdown: str) -> List[str]:
+    """Split markdown into blocks separated by blank lines."""
+    return [block.strip() for block in re.split(r"\n\s*\n", markdown.strip()) if block.strip()]
+
+
+def is_paragraph(block: str) -> bool:
+    """Whether a block is plain prose rather than a heading, list, table, quote, image or code."""
+    first = block.lstrip()
+    return bool(first) and not re.match(r"(#|\||[-*+]\s|\d+[.)]\s|>|!\[|```|~~~)", first)
+
+
+def section_opening(chunk: str) -> Tuple[int, str]:
+    """
+    Find the paragraph that opens an H2 section, right after its heading.
+
+    Returns:
+        Tuple[int, str]: Block index and text of the opening paragraph, or
+        (-1, "") when the section does not open with plain prose
+    """
+    blocks = split_blocks(chunk)
+    for index, block in enumerate(blocks):
+        if _H2.match(block):
+            if index + 1 < len(blocks) and is_paragraph(blocks[index + 1]):
+                return index + 1, blocks[index + 1]
+            break
+    return -1, ""
+
+
+def count_words(markdown: str) -> int:
+    """
+    Count the words of a markdown blog as a reader sees them.
+
+    Headings, code blocks, image syntax, link URLs and HTML tags are not
+    counted; link text, list items, quotes and table cells are.
+
+    Args:
+        markdown (str): Markdown text
+
+    Returns:
+        int: Number of words
+    """
+    text = re.sub(r"(```|~~~).*?\1", " ", markdown, flags=re.S)
+    text = re.sub(r"(?m)^\s*#{1,6}\s.*$", " ", text)
+    text = re.sub(r"!\[[^\]]*\]\([^)]*\)", " ", text)
+    text = re.sub(r"\[([^\]]*)\]\([^)]*\)", r"\1", text)
+    text = re.sub(r"<[^>]+>", " ", text)
+    text = re.sub(r"(?m)^\s*(>|[-*+]|\d+[.)])\s", " ", text)
+    text = re.sub(r"[*_`|]", " ", text)
+    return len(re.findall(r"\w+(?:[-'’]\w+)*", text))
@@ -0,0 +1,169 @@
+"""
+Rate limiter shared by every process on the machine.
+
+Each provider quota (Serper, Google Ads and OpenAI requests per minute, and
+OpenAI tokens per minute) is a token bucket stored in one SQLite file.
+Callers reserve what they need in a short transaction and then wait until
+their reservation is covered, so concurrent workers are queued fairly and
+throughput settles at the configured rate instead of bursting into 429s.
+Providers without a configured limit are not throttled.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from .tracing import get_current_span
+
+RATE_LIMIT_PATH = os.getenv("RATE_LIMIT_PATH", os.path.join(".cache", "rate_limits.sqlite3"))
+# Largest burst a full bucket allows, in seconds of quota
+RATE_LIMIT_BURST_SECONDS = float(os.getenv("RATE_LIMIT_BURST_SECONDS", 5))
+
+
+def _limit(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+# Quotas per minute, keyed by "<provider>:<unit>"
+RATE_LIMITS: Dict[str, Optional[float]] = {
+    "serper:requests": _limit("RATE_LIMIT_SERPER_RPM"),
+    "google_ads:requests": _limit("RATE_LIMIT_GOOGLE_ADS_RPM"),
+    "openai:requests": _limit("RATE_LIMIT_OPENAI_RPM"),
+    "openai:tokens": _limit("RATE_LIMIT_OPENAI_TPM"),
+}
+
+
+class RateLimiter:
+    """Token buckets kept in a SQLite file so that several processes share them."""
+
+    def __init__(self, path: str = RATE_LIMIT_PATH, burst_seconds: float = RATE_LIMIT_BURST_SECONDS):
+        """
+        Args:
+            path (str): SQLite file holding the buckets (created if missing)
+            burst_seconds (float): Bucket capacity, in seconds of quota
+        """
+        self.path = path
+        self.burst_seconds = burst_seconds
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+
+    def reserve(self, bucket: str, amount: float, per_minute: float) -> float:
+        """
+        Take ``amount`` from a bucket, going into debt if it is short.
+
+        Args:
+            bucket (str): Bucket name, e.g. "openai:tokens"
+            amount (float): Requests or tokens needed
+            per_minute (float): Refill rate of the bucket
+
+        Returns:
+            float: Seconds to wait before the reservation is covered
+        """
+        rate = per_minute / 60
+        capacity = max(1.0, rate * self.burst_seconds)
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock, serializing processes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT tokens, updated_at FROM buckets WHERE name = ?", (bucket,)
+                ).fetchone()
+                tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+                tokens -= amount
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    (bucket, tokens, now),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return max(0.0, -tokens / rate)
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide limiter, opening its database on first use."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
+
+
+def _reserve(provider: str, tokens: float = 0, requests: int = 1) -> float:
+    wait = 0.0
+    for unit, amount in (("requests", requests), ("tokens", tokens)):
+        per_minute = RATE_LIMITS.get(f"{provider}:{unit}")
+        if per_minute and amount:
+            wait = max(wait, get_rate_limiter().reserve(f"{provider}:{unit}", amount, per_minute))
+    current = get_current_span()
+    if wait and current is not None:
+        current.set(rate_limit_wait_ms=round(wait * 1000, 1))
+    return wait
+
+
+def rate_limit(provider: str, tokens: float = 0, requests: int = 1) -> float:
+    """
+    Block until a request to ``provider`` fits its quotas.
+
+    Args:
+        provider (str): "serper", "google_ads" or "openai"
+        tokens (float): Tokens the request will use, for tokens/min quotas
+        requests (int): Requests the call counts as, for requests/min quotas
+            (e.g. the number of queries in a batch call)
+
+    Returns:
+        float: Seconds waited
+    """
+    wait = _reserve(provider, tokens, requests)
+    if wait:
+        time.sleep(wait)
+    return wait
+
+
+async def rate_limit_async(provider: str, tokens: float = 0, requests: int = 1) -> float:
+    """
+    Async version of :func:`rate_limit`. The SQLite reservation can block on
+    other processes' locks, so it runs in a worker thread and only the wait
+    itself happens on the event loop.
+    """
+    wait = await asyncio.to_thread(_reserve, provider, tokens, requests)
+    if wait:
+        await asyncio.sleep(wait)
+    return wait
+
+
+def charge_tokens(provider: str, tokens: float):
+    """
+    Charge tokens that were only known after the call (e.g. output tokens)
+    to the provider's tokens/min bucket; later callers wait for them.
+    """
+    per_minute = RATE_LIMITS.get(f"{provider}:tokens")
+    if per_minute and tokens:
+        get_rate_limiter().reserve(f"{provider}:tokens", tokens, per_minute)
+
+
+async def charge_tokens_async(provider: str, tokens: float):
+    """Async version of :func:`charge_tokens`, run off the event loop like :func:`rate_limit_async`."""
+    await asyncio.to_thread(charge_tokens, provider, tokens)
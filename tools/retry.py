@@ -0,0 +1,195 @@
+"""
+Shared retry policy for external calls (OpenAI, Serper, Google Ads).
+
+Transient failures (timeouts, connection errors, 429s and 5xx responses, and
+the equivalent gRPC status codes) are retried with jittered exponential
+backoff, honouring ``Retry-After`` when the service sends one. Anything else
+is fatal and raised at once. Each call has a deadline across all of its
+attempts, so a struggling service cannot stall a blog indefinitely.
+"""
+
+import asyncio
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from .tracing import get_current_span
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+RETRYABLE_GRPC_CODES = {"RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED", "INTERNAL", "ABORTED"}
+RETRYABLE_ERROR_NAMES = {
+    "APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError",
+    "ConnectionError", "ConnectTimeout", "ReadTimeout", "Timeout", "ChunkedEncodingError",
+    "ServiceUnavailable", "TooManyRequests", "ResourceExhausted", "DeadlineExceeded",
+}
+
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", 4))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", 1.0))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", 30.0))
+
+
+class RetryPolicy:
+    """How often and how long to retry a call."""
+
+    def __init__(self, max_attempts: int = RETRY_MAX_ATTEMPTS, base_delay: float = RETRY_BASE_DELAY,
+                 max_delay: float = RETRY_MAX_DELAY, deadline: Optional[float] = None):
+        """
+        Args:
+            max_attempts (int): Attempts in total, including the first one
+            base_delay (float): Backoff before the first retry, in seconds;
+                doubled for every further retry
+            max_delay (float): Cap on a single backoff, in seconds
+            deadline (float): Seconds allowed for all attempts together
+                (default: no deadline)
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff after the given (1-based) failed attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    for holder in (error, getattr(error, "response", None)):
+        code = getattr(holder, "status_code", None)
+        if isinstance(code, int):
+            return code
+    code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def _grpc_code(error: BaseException) -> Optional[str]:
+    """Name of the gRPC status code of a gRPC or Google Ads error, if any."""
+    for holder in (error, getattr(error, "error", None)):
+        code = getattr(holder, "code", None)
+        if callable(code):
+            try:
+                code = code()
+            except Exception:
+                continue
+        name = getattr(code, "name", None)
+        if isinstance(name, str):
+            return name
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether ``error`` is transient and the call may succeed if repeated."""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    grpc_code = _grpc_code(error)
+    if grpc_code is not None:
+        return grpc_code in RETRYABLE_GRPC_CODES
+    return type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the service asked us to wait (``Retry-After`` header), if it did."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def retry_delay(policy: RetryPolicy, error: BaseException, attempt: int, started: float,
+                name: str) -> Optional[float]:
+    """
+    Delay before the next attempt after ``error``, or None if it should be
+    raised. ``started`` is the ``time.monotonic()`` of the first attempt.
+    """
+    if attempt >= policy.max_attempts or not is_retryable(error):
+        return None
+    delay = retry_after(error)
+    delay = policy.backoff(attempt) if delay is None else min(delay, policy.max_delay * 2)
+    if policy.deadline is not None and time.monotonic() - started + delay >= policy.deadline:
+        return None
+    current = get_current_span()
+    if current is not None:
+        current.set(retries=attempt)
+    print(f"🔁 {name} failed ({type(error).__name__}: {error}); retry {attempt}/{policy.max_attempts - 1} in {delay:.1f}s")
+    return delay
+
+
+def call_with_retry(func: Callable[..., T], *args: Any, policy: Optional[RetryPolicy] = None,
+                    name: str = "call", **kwargs: Any) -> T:
+    """
+    Call ``func(*args, **kwargs)``, retrying transient failures.
+
+    Args:
+        func: Function making the external call
+        policy (RetryPolicy): Retry settings (default: RetryPolicy())
+        name (str): Label used in log lines
+
+    Returns:
+        The function's result
+
+    Raises:
+        The last error, once it is fatal, attempts are used up or the
+        deadline would be passed
+    """
+    policy = policy or RetryPolicy()
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            delay = retry_delay(policy, e, attempt, started, name)
+            if delay is None:
+                raise
+        time.sleep(delay)
+
+
+async def acall_with_retry(func: Callable[..., Awaitable[T]], *args: Any, policy: Optional[RetryPolicy] = None,
+                           name: str = "call", **kwargs: Any) -> T:
+    """
+    Await ``func(*args, **kwargs)``, retrying transient failures.
+
+    Same as :func:`call_with_retry`, except that each attempt is also cut
+    off when the policy's deadline is reached (raising TimeoutError).
+    """
+    policy = policy or RetryPolicy()
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            if policy.deadline is None:
+                return await func(*args, **kwargs)
+            remaining = policy.deadline - (time.monotonic() - started)
+            try:
+                return await asyncio.wait_for(func(*args, **kwargs), timeout=max(0.0, remaining))
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"{name} did not finish within its {policy.deadline}s deadline") from None
+        except Exception as e:
+            delay = retry_delay(policy, e, attempt, started, name)
+            if delay is None:
+                raise
+        await asyncio.sleep(delay)
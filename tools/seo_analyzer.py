@@ -0,0 +1,239 @@
+"""
+Deterministic, in-process SEO analysis of a markdown blog.
+
+Computes keyword coverage and density, heading hierarchy, readability,
+sentence and paragraph length distributions and meta-description length,
+and turns them into concrete issues the Proofreader can fix. No network or
+LLM calls are made, so a report takes milliseconds.
+"""
+
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from .markdown_utils import count_words, is_paragraph, split_blocks
+
+# Thresholds used to raise issues
+MAX_KEYWORD_DENSITY = 3.0          # percent of words, per keyword
+LONG_SENTENCE_WORDS = 25
+LONG_PARAGRAPH_WORDS = 120
+META_DESCRIPTION_LENGTH = (120, 160)  # characters
+MIN_READING_EASE = 50.0
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_META = re.compile(r"^\**\s*meta[ -]?description\s*\**\s*[:：]\s*\**\s*(.+?)\s*\**$", re.I | re.M)
+_WORD = re.compile(r"\w+(?:[-'’]\w+)*")
+
+
+def parse_keywords(text: str) -> List[str]:
+    """
+    Parse a keyword list as produced by the KeywordResearcher.
+
+    Accepts bullet or numbered lists and comma-separated lines, and strips
+    markdown emphasis and quotes.
+
+    Args:
+        text (str): Keyword list text
+
+    Returns:
+        List[str]: Unique keywords in their original order
+    """
+    keywords: List[str] = []
+    seen = set()
+    for line in (text or "").splitlines():
+        line = re.sub(r"^\s*(?:[-*+•]|\d+[.)])\s*", "", line)
+        for keyword in line.split(","):
+            keyword = keyword.strip().strip("*_`\"'“”").strip()
+            if keyword and not keyword.startswith("[") and keyword.lower() not in seen:
+                seen.add(keyword.lower())
+                keywords.append(keyword)
+    return keywords
+
+
+def _sentences(text: str) -> List[str]:
+    return [s for s in re.split(r"(?<=[.!?])\s+", text) if _WORD.search(s)]
+
+
+def _syllables(word: str) -> int:
+    """Estimate the syllables in an English word from its vowel groups."""
+    word = word.lower()
+    groups = len(re.findall(r"[aeiouy]+", word))
+    if word.endswith("e") and not word.endswith(("le", "ee")) and groups > 1:
+        groups -= 1
+    return max(1, groups)
+
+
+def _percentile(values: List[int], pct: float) -> int:
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+class SEOAnalyzer:
+    """Local SEO checks for a markdown blog draft."""
+
+    def __init__(self, language: str = "English"):
+        """
+        Args:
+            language (str): Blog language; readability scores are only
+                computed for English
+        """
+        self.language = language
+
+    def _keyword_stats(self, text: str, title: str, headings: List[str], first_paragraph: str,
+                       keywords: List[str], word_count: int) -> List[Dict[str, Any]]:
+        lowered = text.lower()
+        heading_text = " ".join(headings).lower()
+        stats = []
+        for keyword in keywords:
+            pattern = re.compile(r"(?<!\w)" + re.escape(keyword.lower()) + r"(?!\w)")
+            count = len(pattern.findall(lowered))
+            phrase_words = len(_WORD.findall(keyword)) or 1
+            stats.append({
+                "keyword": keyword,
+                "count": count,
+                "density": round(100 * count * phrase_words / word_count, 2) if word_count else 0.0,
+                "in_title": bool(pattern.search(title.lower())),
+                "in_headings": bool(pattern.search(heading_text)),
+                "in_first_paragraph": bool(pattern.search(first_paragraph.lower())),
+            })
+        return stats
+
+    @staticmethod
+    def _heading_issues(headings: List[tuple]) -> List[str]:
+        issues = []
+        levels = [level for level, _ in headings]
+        if levels.count(1) > 1:
+            issues.append(f"There are {levels.count(1)} H1 headings; use at most one")
+        if levels.count(2) < 2:
+            issues.append("Use at least two H2 sections to structure the post")
+        previous = 1
+        for level, text in headings:
+            if level > previous + 1:
+                issues.append(f'Heading "{text}" jumps from H{previous} to H{level}; do not skip levels')
+            if not text:
+                issues.append(f"An H{level} heading is empty")
+            previous = level
+        seen = set()
+        for _, text in headings:
+            if text and text.lower() in seen:
+                issues.append(f'Heading "{text}" is repeated')
+            seen.add(text.lower())
+        return issues
+
+    def _readability(self, sentences: List[str], words: List[str]) -> Optional[Dict[str, float]]:
+        if not self.language.lower().startswith("en") or not sentences or not words:
+            return None
+        words_per_sentence = len(words) / len(sentences)
+        syllables_per_word = sum(_syllables(w) for w in words) / len(words)
+        return {
+            "flesch_reading_ease": round(206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word, 1),
+            "flesch_kincaid_grade": round(0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59, 1),
+        }
+
+    def analyze(self, markdown: str, keywords: str, target_word_count: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Analyze a markdown blog.
+
+        Args:
+            markdown (str): Blog draft in markdown
+            keywords (str): Keyword list (bullets, numbers or commas)
+            target_word_count (int): Requested length, checked when given
+
+        Returns:
+            Dict: Report with word_count, keywords, keyword_coverage,
+            headings, readability, sentences, paragraphs,
+            meta_description, issues and elapsed_ms
+        """
+        start = time.perf_counter()
+        markdown = markdown or ""
+        meta_match = _META.search(markdown)
+        body = _META.sub("", markdown)
+
+        blocks = split_blocks(body)
+        headings = [
+            (len(m.group(1)), m.group(2).strip())
+            for m in (_HEADING.match(block.splitlines()[0]) for block in blocks) if m
+        ]
+        paragraphs = [block for block in blocks if is_paragraph(block)]
+        title = next((text for level, text in headings if level == 1), "")
+        first_paragraph = paragraphs[0] if paragraphs else ""
+
+        prose = " ".join(paragraphs)
+        sentences = _sentences(prose)
+        sentence_lengths = [len(_WORD.findall(s)) for s in sentences]
+        paragraph_lengths = [count_words(p) for p in paragraphs]
+        word_count = count_words(body)
+
+        keyword_list = parse_keywords(keywords)
+        keyword_stats = self._keyword_stats(
+            body, title, [text for _, text in headings], first_paragraph, keyword_list, word_count
+        )
+        coverage = (
+            round(sum(1 for k in keyword_stats if k["count"]) / len(keyword_stats), 2)
+            if keyword_stats else None
+        )
+
+        meta_text = meta_match.group(1).strip() if meta_match else ""
+        readability = self._readability(sentences, _WORD.findall(prose))
+        long_sentences = sum(1 for n in sentence_lengths if n > LONG_SENTENCE_WORDS)
+        long_paragraphs = sum(1 for n in paragraph_lengths if n > LONG_PARAGRAPH_WORDS)
+
+        issues = self._heading_issues(headings)
+        missing = [k["keyword"] for k in keyword_stats if not k["count"]]
+        if missing:
+            issues.append("Keywords not used: " + ", ".join(missing))
+        for k in keyword_stats:
+            if k["density"] > MAX_KEYWORD_DENSITY:
+                issues.append(f'"{k["keyword"]}" density is {k["density"]}%; reduce it below {MAX_KEYWORD_DENSITY}%')
+        if keyword_stats and not keyword_stats[0]["in_headings"]:
+            issues.append(f'Use the primary keyword "{keyword_stats[0]["keyword"]}" in a heading')
+        if keyword_stats and not keyword_stats[0]["in_first_paragraph"]:
+            issues.append(f'Use the primary keyword "{keyword_stats[0]["keyword"]}" in the first paragraph')
+        if long_sentences:
+            issues.append(f"{long_sentences} sentences are longer than {LONG_SENTENCE_WORDS} words; split them")
+        if long_paragraphs:
+            issues.append(f"{long_paragraphs} paragraphs are longer than {LONG_PARAGRAPH_WORDS} words; break them up")
+        if readability and readability["flesch_reading_ease"] < MIN_READING_EASE:
+            issues.append(
+                f"Reading ease is {readability['flesch_reading_ease']}; "
+                f"aim for {MIN_READING_EASE:.0f}+ with shorter sentences and simpler words"
+            )
+        low, high = META_DESCRIPTION_LENGTH
+        if meta_text and not low <= len(meta_text) <= high:
+            issues.append(f"Meta description is {len(meta_text)} characters; keep it within {low}-{high}")
+        if target_word_count and abs(word_count - target_word_count) > 0.1 * target_word_count:
+            issues.append(f"Post is {word_count} words; the target is {target_word_count}")
+
+        return {
+            "word_count": word_count,
+            "keywords": keyword_stats,
+            "keyword_coverage": coverage,
+            "headings": {
+                "h1": sum(1 for level, _ in headings if level == 1),
+                "h2": sum(1 for level, _ in headings if level == 2),
+                "h3": sum(1 for level, _ in headings if level == 3),
+            },
+            "readability": readability,
+            "sentences": {
+                "count": len(sentence_lengths),
+                "avg_words": round(sum(sentence_lengths) / len(sentence_lengths), 1) if sentence_lengths else 0,
+                "p90_words": _percentile(sentence_lengths, 90),
+                "long": long_sentences,
+            },
+            "paragraphs": {
+                "count": len(paragraph_lengths),
+                "avg_words": round(sum(paragraph_lengths) / len(paragraph_lengths), 1) if paragraph_lengths else 0,
+                "max_words": max(paragraph_lengths, default=0),
+                "long": long_paragraphs,
+            },
+            "meta_description": {"text": meta_text, "length": len(meta_text)},
+            "issues": issues,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    @staticmethod
+    def format_issues(report: Dict[str, Any]) -> str:
+        """Format a report's issues as a bullet list for an agent prompt."""
+        return "\n".join(f"- {issue}" for issue in report.get("issues", []))
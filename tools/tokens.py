@@ -0,0 +1,71 @@
+"""
+Local token counting used for prompt budgets and trace payload sizes.
+
+Uses tiktoken when it is installed and falls back to a ~4 characters per
+token estimate otherwise, so callers never need the network or an API call.
+"""
+
+import math
+import threading
+
+TOKENIZER_ENCODING = "o200k_base"
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """Load the tiktoken encoding on first use (None if tiktoken is unavailable)."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+                except Exception:
+                    _encoding = None
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens in ``text``.
+
+    Args:
+        text (str): Any text
+
+    Returns:
+        int: Exact count with tiktoken, otherwise an estimate
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut ``text`` down to at most ``max_tokens`` tokens.
+
+    Args:
+        text (str): Any text
+        max_tokens (int): Token limit
+
+    Returns:
+        str: ``text`` unchanged if it fits, otherwise its longest prefix that fits
+    """
+    if max_tokens <= 0 or not text:
+        return ""
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[:max_tokens])
+    return text[:max_tokens * CHARS_PER_TOKEN]
@@ -0,0 +1,173 @@
+"""
+Lightweight structured tracing for the blog workflow.
+
+A trace is started per blog; every workflow stage and external call inside
+it records a span with wall time, payload sizes and cache hit/miss. The
+current trace and span follow the context (asyncio tasks and worker threads
+started with a copied context), so instrumented code never has to pass them
+around. Outside a trace, spans are created but not recorded.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from .tokens import count_tokens
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """A timed unit of work inside a trace."""
+
+    def __init__(self, name: str, kind: str, parent_id: Optional[str], start_offset: float,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.span_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.kind = kind
+        self.parent_id = parent_id
+        self.start_offset = start_offset
+        self.duration = None
+        self.status = "ok"
+        self.error = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+
+    def set(self, **attributes: Any):
+        """Attach extra attributes to the span."""
+        self.attributes.update(attributes)
+
+    def mark_error(self, error: str):
+        """Flag the span as failed when the error is handled instead of raised."""
+        self.status = "error"
+        self.error = error
+
+    def record_input(self, text: str):
+        """Record the size of the payload sent to the stage or service."""
+        text = text or ""
+        self.attributes["input_chars"] = len(text)
+        self.attributes["input_tokens"] = count_tokens(text)
+
+    def record_output(self, text: str):
+        """Record the size of the payload that came back."""
+        text = text or ""
+        self.attributes["output_chars"] = len(text)
+        self.attributes["output_tokens"] = count_tokens(text)
+
+    def record_cache(self, hit: bool):
+        """Record whether the result was served from a cache."""
+        self.attributes["cache"] = "hit" if hit else "miss"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ms": round(self.start_offset * 1000, 1),
+            "duration_ms": round(self.duration * 1000, 1) if self.duration is not None else None,
+            "status": self.status,
+            "error": self.error,
+            **self.attributes,
+        }
+
+
+class Trace:
+    """Collection of spans recorded for one workflow run."""
+
+    def __init__(self, name: str, **attributes: Any):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.attributes = attributes
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.duration = None
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_offset)
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 1) if self.duration is not None else None,
+            **self.attributes,
+            "spans": [s.to_dict() for s in spans],
+        }
+
+    def write(self, path: str):
+        """Write the trace as JSON to ``path``."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False, default=str)
+
+
+def get_current_trace() -> Optional[Trace]:
+    """Return the trace active in the current context, if any."""
+    return _current_trace.get()
+
+
+def get_current_span() -> Optional[Span]:
+    """Return the innermost span open in the current context, if any."""
+    return _current_span.get()
+
+
+@contextmanager
+def start_trace(name: str, **attributes: Any) -> Iterator[Trace]:
+    """Start a new trace for everything run inside the block."""
+    trace = Trace(name, **attributes)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    finally:
+        trace.duration = trace.elapsed()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes: Any) -> Iterator[Span]:
+    """
+    Record a span around the block in the current trace.
+
+    Args:
+        name (str): Span name, e.g. a stage name or "serper.search"
+        kind (str): Span category: "stage", "llm", "http", "grpc" or "internal"
+        **attributes: Initial span attributes
+    """
+    trace = _current_trace.get()
+    parent = _current_span.get()
+    current = Span(
+        name, kind,
+        parent.span_id if parent else None,
+        trace.elapsed() if trace else 0.0,
+        attributes,
+    )
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.mark_error(f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+        _current_span.reset(token)
+        if trace is not None:
+            trace.add(current)
@@ -1,19 +1,246 @@
+import contextvars
+import json
 import os
+import re
+import threading
 import requests
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Any, List, Dict, Optional
 from dotenv import load_dotenv
 from datetime import datetime
 
+from .cache import PersistentCache
+from .rate_limit import rate_limit
+from .retry import RetryPolicy, call_with_retry
+from .tokens import count_tokens, truncate_to_tokens
+from .tracing import Span, span
+
 load_dotenv()
 
+SERPER_SEARCH_URL = "https://google.serper.dev/search"
+SERPER_NEWS_URL = "https://google.serper.dev/news"
+# Most queries Serper accepts in one batched request
+SERPER_BATCH_SIZE = 100
+
+# Result cache settings; news goes stale much faster than web results
+SERPER_CACHE_PATH = os.getenv('SERPER_CACHE_PATH', os.path.join('.cache', 'serper.sqlite3'))
+SERPER_CACHE_TTLS = {
+    'search': float(os.getenv('SERPER_CACHE_TTL_WEB', 24 * 3600)),
+    'news': float(os.getenv('SERPER_CACHE_TTL_NEWS', 3600)),
+}
+SERPER_CACHE_MAX_ENTRIES = int(os.getenv('SERPER_CACHE_MAX_ENTRIES', 5000))
+SERPER_CACHE_ENABLED = os.getenv('SERPER_CACHE_DISABLED', '').lower() not in ('1', 'true', 'yes')
+
+# Retries for 429s, 5xx and network errors; the deadline covers all attempts of one query
+SERPER_RETRY_POLICY = RetryPolicy(deadline=float(os.getenv('SERPER_CALL_DEADLINE', 60)))
+
+
+# Shortest snippet worth keeping when a result is cut to fit a token budget
+MIN_SNIPPET_TOKENS = 12
+
+_RELATIVE_DATE = re.compile(r"(\d+)\s+(minute|hour|day|week|month|year)s?\s+ago", re.IGNORECASE)
+_DAYS_PER_UNIT = {'minute': 1 / 1440, 'hour': 1 / 24, 'day': 1, 'week': 7, 'month': 30, 'year': 365}
+_DATE_FORMATS = ("%b %d, %Y", "%B %d, %Y", "%d %b %Y", "%d %B %Y", "%Y-%m-%d", "%b %Y", "%B %Y")
+
+
+def result_age_days(date: str, now: Optional[datetime] = None) -> Optional[float]:
+    """
+    Age in days of a Serper result date ("3 days ago", "Jan 5, 2025", ...),
+    or None if the date is missing or not recognised.
+    """
+    date = (date or '').strip()
+    if not date:
+        return None
+    match = _RELATIVE_DATE.search(date)
+    if match:
+        return int(match.group(1)) * _DAYS_PER_UNIT[match.group(2).lower()]
+    for date_format in _DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(date, date_format)
+        except ValueError:
+            continue
+        return max(0.0, ((now or datetime.now()) - parsed).total_seconds() / 86400)
+    return None
+
+
+def rank_search_results(results: List[Dict], queries: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Order results for a prompt: answer boxes first, then by recency (a
+    30-day half-life; undated results count as a year old) plus the share
+    of query terms found in the title and snippet. Ties keep their order.
+    """
+    terms = {term for query in (queries or []) for term in re.findall(r"\w+", query.lower()) if len(term) > 2}
+    now = datetime.now()
+
+    def score(result: Dict) -> float:
+        age = result_age_days(result.get('date', ''), now)
+        recency = 0.5 ** ((365 if age is None else age) / 30)
+        if not terms:
+            return recency
+        words = set(re.findall(r"\w+", f"{result.get('title', '')} {result.get('snippet', '')}".lower()))
+        return recency + len(terms & words) / len(terms)
+
+    answer_boxes = [r for r in results if r.get('type') == 'answer_box']
+    others = [r for r in results if r.get('type') != 'answer_box']
+    return answer_boxes + sorted(others, key=score, reverse=True)
+
+
+def _format_result(result: Dict, number: int) -> str:
+    """Render one result the way it appears in the research prompt."""
+    result_type = result.get('type', 'web')
+    if result_type == 'answer_box':
+        lines = ["**Answer Box:**", f"- {result.get('snippet', '')}"]
+        if result.get('link'):
+            lines.append(f"- Source: {result['link']}")
+    elif result_type == 'news':
+        lines = [f"{number}. **{result.get('title', 'No title')}**", f"   - Source: {result.get('source', 'Unknown')}"]
+        if result.get('date'):
+            lines.append(f"   - Date: {result['date']}")
+        lines.append(f"   - Summary: {result.get('snippet', 'No summary available')}")
+        lines.append(f"   - Link: {result.get('link', '')}")
+    else:
+        lines = [f"{number}. **{result.get('title', 'No title')}**", f"   - Summary: {result.get('snippet', 'No summary available')}"]
+        if result.get('date'):
+            lines.append(f"   - Date: {result['date']}")
+        lines.append(f"   - Link: {result.get('link', '')}")
+    if result_type != 'answer_box' and result.get('also_at'):
+        lines.append(f"   - Also reported by: {', '.join(result['also_at'])}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _fit_result(result: Dict, number: int, max_tokens: int) -> str:
+    """Render a result with its snippet cut to fit ``max_tokens`` ("" if too little is left)."""
+    snippet = result.get('snippet', '')
+    snippet_tokens = max_tokens - count_tokens(_format_result(dict(result, snippet=''), number))
+    while snippet_tokens >= MIN_SNIPPET_TOKENS:
+        cut = truncate_to_tokens(snippet, snippet_tokens).rstrip() + "…"
+        entry = _format_result(dict(result, snippet=cut), number)
+        if count_tokens(entry) <= max_tokens:
+            return entry
+        snippet_tokens -= 1
+    return ""
+
+
 class WebSearchTool:
     """Web search tool using Serper API for real-time information retrieval."""
     
-    def __init__(self):
+    def __init__(self, max_workers: int = 8, timeout: float = 30, use_cache: bool = SERPER_CACHE_ENABLED):
+        """
+        Args:
+            max_workers (int): Maximum number of queries sent at the same time,
+                also the size of the keep-alive connection pool
+            timeout (float): Per-request timeout in seconds
+            use_cache (bool): Serve repeated queries from the on-disk result cache
+        """
         self.serper_api_key = os.getenv('SERPER_API_KEY')
-        self.base_url = "https://google.serper.dev/search"
+        self.base_url = SERPER_SEARCH_URL
+        self.news_url = SERPER_NEWS_URL
+        self.max_workers = max_workers
+        self.timeout = timeout
         self.search_count = 0
         self.last_search_time = None
+        self._stats_lock = threading.Lock()
+        self.session = self._create_session()
+        self.cache_ttls = dict(SERPER_CACHE_TTLS)
+        self.cache = PersistentCache(SERPER_CACHE_PATH, max_entries=SERPER_CACHE_MAX_ENTRIES) if use_cache else None
+
+    def _create_session(self) -> requests.Session:
+        """Create a keep-alive session so queries reuse pooled TCP/TLS connections."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.max_workers)
+        session.mount("https://", adapter)
+        session.headers.update({'Content-Type': 'application/json'})
+        return session
+
+    def _track_search(self):
+        with self._stats_lock:
+            self.search_count += 1
+            self.last_search_time = datetime.now()
+
+    def _post(self, url: str, payload: Any) -> Any:
+        """
+        Send a Serper request over the pooled session and return the JSON body
+        (a list of responses when ``payload`` is a list of queries).
+        Every attempt waits for the shared Serper rate limit, which counts
+        each query of a batch as one request; transient failures are retried
+        under ``SERPER_RETRY_POLICY``.
+        """
+        requests_used = len(payload) if isinstance(payload, list) else 1
+
+        def send() -> Any:
+            rate_limit("serper", requests=requests_used)
+            response = self.session.post(
+                url,
+                headers={'X-API-KEY': self.serper_api_key},
+                json=payload,
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            return response.json()
+
+        return call_with_retry(send, policy=SERPER_RETRY_POLICY, name=f"serper {url.rsplit('/', 1)[-1]}")
+
+    @staticmethod
+    def _cache_key(endpoint: str, query: str, num_results: int) -> str:
+        """Key results on the endpoint, case/whitespace-normalized query and result count."""
+        normalized_query = " ".join(query.lower().split())
+        return PersistentCache.make_key("serper", endpoint, normalized_query, num_results)
+
+    def _cached(self, endpoint: str, query: str, num_results: int) -> Optional[List[Dict]]:
+        if self.cache is None:
+            return None
+        return self.cache.get(self._cache_key(endpoint, query, num_results), ttl=self.cache_ttls.get(endpoint))
+
+    def _store(self, endpoint: str, query: str, num_results: int, results: List[Dict]):
+        if self.cache is not None:
+            self.cache.set(self._cache_key(endpoint, query, num_results), results)
+
+    @staticmethod
+    def _parse_search_response(data: Dict, num_results: int) -> List[Dict]:
+        """Convert a Serper /search response into result dicts."""
+        results = []
+        
+        # Extract organic search results
+        if 'organic' in data:
+            for result in data['organic'][:num_results]:
+                results.append({
+                    'title': result.get('title', ''),
+                    'link': result.get('link', ''),
+                    'snippet': result.get('snippet', ''),
+                    'date': result.get('date', '')
+                })
+        
+        # Add answer box if available
+        if 'answerBox' in data:
+            answer_box = data['answerBox']
+            results.insert(0, {
+                'title': 'Answer Box',
+                'link': answer_box.get('link', ''),
+                'snippet': answer_box.get('answer', answer_box.get('snippet', '')),
+                'date': '',
+                'type': 'answer_box'
+            })
+        
+        return results
+
+    @staticmethod
+    def _parse_news_response(data: Dict, num_results: int) -> List[Dict]:
+        """Convert a Serper /news response into result dicts."""
+        results = []
+        
+        if 'news' in data:
+            for result in data['news'][:num_results]:
+                results.append({
+                    'title': result.get('title', ''),
+                    'link': result.get('link', ''),
+                    'snippet': result.get('snippet', ''),
+                    'date': result.get('date', ''),
+                    'source': result.get('source', ''),
+                    'type': 'news'
+                })
+        
+        return results
     
     def search(self, query: str, num_results: int = 5) -> List[Dict]:
         """
@@ -26,17 +253,25 @@ class WebSearchTool:
         Returns:
             List[Dict]: List of search results with title, link, snippet
         """
+        with span("serper.search", kind="http", query=query, num_results=num_results) as search_span:
+            search_span.record_input(query)
+            results = self._search(query, num_results, search_span)
+            search_span.record_output(json.dumps(results, ensure_ascii=False))
+            if len(results) == 1 and 'error' in results[0]:
+                search_span.mark_error(results[0]['error'])
+            return results
+
+    def _search(self, query: str, num_results: int, search_span: Span) -> List[Dict]:
         # Track search attempt
-        self.search_count += 1
-        self.last_search_time = datetime.now()
+        self._track_search()
         
         if not self.serper_api_key:
             return [{"error": "SERPER_API_KEY not found in environment variables"}]
         
-        headers = {
-            'X-API-KEY': self.serper_api_key,
-            'Content-Type': 'application/json'
-        }
+        cached = self._cached('search', query, num_results)
+        search_span.record_cache(cached is not None)
+        if cached is not None:
+            return cached
         
         payload = {
             'q': query,
@@ -44,34 +279,9 @@ class WebSearchTool:
         }
         
         try:
-            response = requests.post(self.base_url, headers=headers, json=payload)
-            response.raise_for_status()
-            
-            data = response.json()
-            results = []
-            
-            # Extract organic search results
-            if 'organic' in data:
-                organic_count = len(data['organic'][:num_results])
-                for result in data['organic'][:num_results]:
-                    results.append({
-                        'title': result.get('title', ''),
-                        'link': result.get('link', ''),
-                        'snippet': result.get('snippet', ''),
-                        'date': result.get('date', '')
-                    })
-            
-            # Add answer box if available
-            if 'answerBox' in data:
-                answer_box = data['answerBox']
-                results.insert(0, {
-                    'title': 'Answer Box',
-                    'link': answer_box.get('link', ''),
-                    'snippet': answer_box.get('answer', answer_box.get('snippet', '')),
-                    'date': '',
-                    'type': 'answer_box'
-                })
-            
+            data = self._post(self.base_url, payload)
+            results = self._parse_search_response(data, num_results)
+            self._store('search', query, num_results, results)
             return results
             
         except requests.exceptions.RequestException as e:
@@ -90,17 +300,25 @@ class WebSearchTool:
         Returns:
             List[Dict]: List of news results
         """
+        with span("serper.news", kind="http", query=query, num_results=num_results) as search_span:
+            search_span.record_input(query)
+            results = self._search_news(query, num_results, search_span)
+            search_span.record_output(json.dumps(results, ensure_ascii=False))
+            if len(results) == 1 and 'error' in results[0]:
+                search_span.mark_error(results[0]['error'])
+            return results
+
+    def _search_news(self, query: str, num_results: int, search_span: Span) -> List[Dict]:
         # Track news search attempt
-        self.search_count += 1
-        self.last_search_time = datetime.now()
+        self._track_search()
         
         if not self.serper_api_key:
             return [{"error": "SERPER_API_KEY not found in environment variables"}]
         
-        headers = {
-            'X-API-KEY': self.serper_api_key,
-            'Content-Type': 'application/json'
-        }
+        cached = self._cached('news', query, num_results)
+        search_span.record_cache(cached is not None)
+        if cached is not None:
+            return cached
         
         payload = {
             'q': query,
@@ -108,37 +326,147 @@ class WebSearchTool:
         }
         
         try:
-            response = requests.post("https://google.serper.dev/news", headers=headers, json=payload)
-            response.raise_for_status()
-            
-            data = response.json()
-            results = []
-            
-            if 'news' in data:
-                news_count = len(data['news'][:num_results])
-                for result in data['news'][:num_results]:
-                    results.append({
-                        'title': result.get('title', ''),
-                        'link': result.get('link', ''),
-                        'snippet': result.get('snippet', ''),
-                        'date': result.get('date', ''),
-                        'source': result.get('source', ''),
-                        'type': 'news'
-                    })
-            
+            data = self._post(self.news_url, payload)
+            results = self._parse_news_response(data, num_results)
+            self._store('news', query, num_results, results)
             return results
             
         except requests.exceptions.RequestException as e:
             return [{"error": f"News search request failed: {str(e)}"}]
         except Exception as e:
             return [{"error": f"News search error: {str(e)}"}]
+
+    def search_parallel(self, queries: List[Dict]) -> List[List[Dict]]:
+        """
+        Run several searches at the same time over the pooled session.
+        
+        Args:
+            queries (List[Dict]): One dict per search with 'query', and
+                optionally 'num_results' (default: 5) and 'type' ('web' or 'news')
+            
+        Returns:
+            List[List[Dict]]: Results for each query, in the same order as
+            ``queries``, in the format returned by :meth:`search`/:meth:`search_news`
+        """
+        if not queries:
+            return []
+
+        def run_query(item: Dict) -> List[Dict]:
+            search_fn = self.search_news if item.get('type') == 'news' else self.search
+            return search_fn(item['query'], num_results=item.get('num_results', 5))
+
+        workers = min(self.max_workers, len(queries))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="serper") as pool:
+            # Each worker runs in a copy of the caller's context so spans land in its trace
+            futures = [pool.submit(contextvars.copy_context().run, run_query, item) for item in queries]
+            return [future.result() for future in futures]
     
-    def format_search_results(self, results: List[Dict]) -> str:
+    def search_many(self, queries: List[Dict]) -> List[List[Dict]]:
+        """
+        Run several searches with one batched Serper request per endpoint.
+
+        Queries already in the result cache are answered from it; the rest
+        are packed into a single request to /search (and one to /news, sent
+        at the same time when both are needed).
+
+        Args:
+            queries (List[Dict]): One dict per search with 'query', and
+                optionally 'num_results' (default: 5) and 'type' ('web' or 'news')
+
+        Returns:
+            List[List[Dict]]: Results for each query, in the same order as
+            ``queries``, in the format returned by :meth:`search`/:meth:`search_news`
+        """
+        if not queries:
+            return []
+
+        groups: Dict[str, List[int]] = {}
+        for index, item in enumerate(queries):
+            endpoint = 'news' if item.get('type') == 'news' else 'search'
+            groups.setdefault(endpoint, []).append(index)
+
+        def run_group(endpoint: str, indices: List[int]) -> List[List[Dict]]:
+            return self._search_batch(endpoint, [queries[i] for i in indices])
+
+        results: List[List[Dict]] = [[] for _ in queries]
+        with ThreadPoolExecutor(max_workers=len(groups), thread_name_prefix="serper") as pool:
+            futures = {
+                endpoint: pool.submit(contextvars.copy_context().run, run_group, endpoint, indices)
+                for endpoint, indices in groups.items()
+            }
+            for endpoint, future in futures.items():
+                for index, group_results in zip(groups[endpoint], future.result()):
+                    results[index] = group_results
+        return results
+
+    def _search_batch(self, endpoint: str, items: List[Dict]) -> List[List[Dict]]:
+        """Answer ``items`` from the cache where possible and fetch the rest in batched requests."""
+        url, parse = (
+            (self.news_url, self._parse_news_response) if endpoint == 'news'
+            else (self.base_url, self._parse_search_response)
+        )
+        label = "News search" if endpoint == 'news' else "Search"
+        with span(f"serper.{endpoint}_batch", kind="http", queries=len(items)) as batch_span:
+            batch_span.record_input("\n".join(item['query'] for item in items))
+            for _ in items:
+                self._track_search()
+
+            if not self.serper_api_key:
+                return [[{"error": "SERPER_API_KEY not found in environment variables"}] for _ in items]
+
+            results: List[Optional[List[Dict]]] = [None] * len(items)
+            misses = []
+            for index, item in enumerate(items):
+                cached = self._cached(endpoint, item['query'], item.get('num_results', 5))
+                if cached is None:
+                    misses.append(index)
+                else:
+                    results[index] = cached
+            batch_span.set(cache_hits=len(items) - len(misses), requests=0)
+
+            for start in range(0, len(misses), SERPER_BATCH_SIZE):
+                chunk = misses[start:start + SERPER_BATCH_SIZE]
+                payload = [{'q': items[i]['query'], 'num': items[i].get('num_results', 5)} for i in chunk]
+                try:
+                    data = self._post(url, payload)
+                    batch_span.set(requests=batch_span.attributes["requests"] + 1)
+                    if isinstance(data, dict):
+                        data = [data]
+                    if len(data) != len(chunk):
+                        raise ValueError(f"expected {len(chunk)} responses, got {len(data)}")
+                    for index, response in zip(chunk, data):
+                        num_results = items[index].get('num_results', 5)
+                        results[index] = parse(response, num_results)
+                        self._store(endpoint, items[index]['query'], num_results, results[index])
+                except requests.exceptions.RequestException as e:
+                    for index in chunk:
+                        results[index] = [{"error": f"{label} request failed: {str(e)}"}]
+                except Exception as e:
+                    for index in chunk:
+                        results[index] = [{"error": f"{label} error: {str(e)}"}]
+
+            failed = [r[0]['error'] for r in results if len(r) == 1 and 'error' in r[0]]
+            if failed:
+                batch_span.mark_error(failed[0])
+            batch_span.record_output(json.dumps(results, ensure_ascii=False))
+            return results
+
+    def format_search_results(self, results: List[Dict], token_budget: Optional[int] = None,
+                              queries: Optional[List[str]] = None) -> str:
         """
         Format search results into a readable string for the AI agent.
         
+        Results are ranked with answer boxes first, then by how recent they
+        are and how many of the query terms they cover. With a token budget,
+        they are added in that order until the budget is used up; a result
+        that does not fit has its snippet cut to what is left, or is skipped
+        if even that is too long, so the output fills but never exceeds it.
+        
         Args:
             results (List[Dict]): List of search results
+            token_budget (int): Maximum tokens of the output (default: no limit)
+            queries (List[str]): Queries the results were found with, used to
+                rank them by query coverage
             
         Returns:
             str: Formatted search results
@@ -149,47 +477,52 @@ class WebSearchTool:
         if len(results) == 1 and 'error' in results[0]:
             return f"Search error: {results[0]['error']}"
         
-        formatted = "### Search Results:\n\n"
-        
-        for i, result in enumerate(results, 1):
-            if 'error' in result:
-                formatted += f"{i}. Error: {result['error']}\n\n"
-                continue
-                
-            result_type = result.get('type', 'web')
-            if result_type == 'answer_box':
-                formatted += f"**Answer Box:**\n"
-                formatted += f"- {result.get('snippet', '')}\n"
-                if result.get('link'):
-                    formatted += f"- Source: {result['link']}\n"
-                formatted += "\n"
-            elif result_type == 'news':
-                formatted += f"{i}. **{result.get('title', 'No title')}**\n"
-                formatted += f"   - Source: {result.get('source', 'Unknown')}\n"
-                if result.get('date'):
-                    formatted += f"   - Date: {result['date']}\n"
-                formatted += f"   - Summary: {result.get('snippet', 'No summary available')}\n"
-                formatted += f"   - Link: {result.get('link', '')}\n\n"
-            else:
-                formatted += f"{i}. **{result.get('title', 'No title')}**\n"
-                formatted += f"   - Summary: {result.get('snippet', 'No summary available')}\n"
-                if result.get('date'):
-                    formatted += f"   - Date: {result['date']}\n"
-                formatted += f"   - Link: {result.get('link', '')}\n\n"
-        
-        return formatted
+        header = "### Search Results:\n\n"
+        ranked = rank_search_results([r for r in results if 'error' not in r], queries)
+        remaining = None if token_budget is None else token_budget - count_tokens(header)
+        entries = []
+        
+        number = 0
+        for result in ranked:
+            if remaining is not None and remaining <= 0:
+                break
+            next_number = number + (result.get('type') != 'answer_box')
+            entry = _format_result(result, next_number)
+            if remaining is not None:
+                cost = count_tokens(entry)
+                if cost > remaining:
+                    # Cut the snippet to what is left; a result too long even
+                    # then is skipped so shorter ones further down can fill in
+                    entry = _fit_result(result, next_number, remaining)
+                    if not entry:
+                        continue
+                    cost = count_tokens(entry)
+                remaining -= cost
+            entries.append(entry)
+            number = next_number
+        
+        omitted = len(ranked) - len(entries)
+        if omitted and remaining is not None:
+            print(f"✂️ Search results trimmed to {token_budget} tokens ({omitted} of {len(ranked)} results left out)")
+        return header + "".join(entries)
     
     def get_search_stats(self) -> Dict:
         """
         Get statistics about web search usage.
         
         Returns:
-            Dict: Search statistics including count and last search time
+            Dict: Search statistics including count, last search time and
+            result cache hits/misses
         """
+        cache_stats = self.cache.get_stats() if self.cache is not None else {}
         return {
             'total_searches': self.search_count,
             'last_search_time': self.last_search_time.isoformat() if self.last_search_time else None,
-            'api_key_configured': bool(self.serper_api_key)
+            'api_key_configured': bool(self.serper_api_key),
+            'cache_enabled': self.cache is not None,
+            'cache_hits': cache_stats.get('hits', 0),
+            'cache_misses': cache_stats.get('misses', 0),
+            'cache_entries': cache_stats.get('entries', 0),
         }
     
     def print_search_stats(self):
@@ -200,6 +533,8 @@ class WebSearchTool:
         print("="*50)
         print(f"Total Searches Performed: {stats['total_searches']}")
         print(f"API Key Configured: {'✅ Yes' if stats['api_key_configured'] else '❌ No'}")
+        if stats['cache_enabled']:
+            print(f"Cache Hits/Misses: {stats['cache_hits']}/{stats['cache_misses']} ({stats['cache_entries']} entries)")
         if stats['last_search_time']:
             print(f"Last Search Time: {stats['last_search_time']}")
         else: